@@ -5,20 +5,26 @@ A simple IRC bot that captures and saves links shared in channels.
 """
 
 import irc.bot
+import irc.client
 import irc.strings
 import irc.connection
 import ssl
 import logging
 import sys
 import re
-from threading import Thread
+import queue
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import time
+import functools
+import random
+from typing import Optional
 
 from config import Config
-from database import Database
+from database import Database, MessageWriter
 from link_handler import LinkHandler
 from llm_handler import LLMHandler
-from rate_limiter import RateLimiter
+from rate_limiter import RateLimiter, TokenBucket
 from prompts import get_thinking_message
 from context_manager import ContextManager
 from content_filter import ContentFilter
@@ -30,12 +36,158 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Links seen in a channel within this many seconds are not processed again
+RECENT_URL_TTL = 300
+RECENT_URL_MAX = 1024
+
+# Command table entry: handler method name and the Config flag that sends its output privately
+CommandSpec = namedtuple('CommandSpec', ['handler', 'private_setting'])
+
+# Outbound flood control: bursts of up to SEND_BURST lines, then SEND_RATE lines per second
+SEND_BURST = 4
+SEND_RATE = 2.0
+
+# Sentence boundaries long replies are preferably split at
+SENTENCE_END_RE = re.compile(r'[.!?] ')
+
+# Replies to a bare mention with no question
+MENTION_REPLIES = (
+    "Hi {user}! I'm here to help. Try !ask <question> or !help for commands.",
+    "Yes {user}? I can answer questions with !ask or save your links automatically.",
+    "Hello {user}! Use !help to see what I can do, or just ask me something with !ask.",
+)
+
+# Phrases and single-word messages asking what the bot can do
+CAPABILITY_PHRASES = (
+    "what can you do", "what do you do", "what are you for",
+    "what are your capabilities", "what are your features",
+    "what can you help with", "what can you help me with",
+    "how can you help", "what commands", "what functions",
+    "what are your commands", "what are your functions",
+    "help me", "show help", "tell me what you do",
+    "what's your purpose", "what is your purpose",
+    "how do you work", "what do you offer"
+)
+CAPABILITY_PHRASES_RE = re.compile('|'.join(map(re.escape, CAPABILITY_PHRASES)))
+# Whitespace and punctuation ignored around single-word requests like "help?" or "links!"
+EDGE_PUNCTUATION = " \t\r\n?!.,;:"
+CAPABILITY_WORDS = frozenset(("help", "capabilities", "commands", "functions", "purpose"))
+
+# Fixed part of the reply to "what can you do?"
+CAPABILITY_LINES = (
+    "📎 I automatically save any links you share in the channel",
+    "💬 You can mention me or ask me questions and I'll respond using AI",
+    "🔍 Link management commands:",
+    "  • !links - Show recent links",
+    "  • !links search <term> - Search saved links",
+    "  • !links by <user> - Show links by specific user",
+    "  • !links stats - Show statistics",
+    "  • !links details - Show recent links with timestamps",
+    "🤖 AI commands:",
+    "  • !ask <question> - Ask me anything",
+    "  • Just mention my name and ask a question",
+    "📊 Utility commands:",
+    "  • !ratelimit - Check rate limit status",
+    "  • !performance - Show AI performance stats",
+    "  • !help - Show command help",
+    "📩 Most commands send responses privately to keep the channel clean",
+    "💬 !ask responses stay public for everyone's benefit",
+)
+
+# Phrases that always mean a link request, and words that make "links" a request
+EXPLICIT_LINK_PHRASES = (
+    "saved links", "recent links", "show links", "get links",
+    "list links", "what links", "any links", "share links",
+    "links you saved", "links you have", "links stats",
+    "links statistics", "detailed links"
+)
+LINK_ACTION_WORDS = (
+    "show", "get", "give", "list", "what", "any", "have", "share", "find",
+    "search", "stats", "statistics", "detailed", "need", "want"
+)
+
+# Natural-language link requests ("what links have you saved?", "find python links", ...).
+# Each pattern has a single .* gap and no nested quantifiers, so a non-matching message
+# can't make the engine backtrack catastrophically.
+LINK_REQUEST_PATTERNS = (
+    re.compile(r'(?:what|any|show|get|have|share|find|search|need|want).*\blinks?\b'),
+    re.compile(r'\blinks?\b.*(?:you|saved|recent|have|stats|statistics|detailed)'),
+    re.compile(r'(?:stats|statistics|detailed).*\blinks?\b'),
+)
+LINK_SEARCH_RE = re.compile(r'(?:search|find|look for)\s+(\S+(?:\s+\S+)*?)(?=\s+links?|$)')
+LINK_USER_RE = re.compile(r'(?:by|from|shared by)\s+(\w+)')
+
+# Reasoning blocks some local models prepend to their answers
+THINK_TAG_RE = re.compile(r'<think>.*?</think>', re.DOTALL)
+
+# Static response text, built once at import
+HELP_LINES = (
+    "🤖 AircBot Commands:",
+    "!links - Show recent links",
+    "!links details - Show recent links with timestamps",
+    "!links search <term> - Search saved links",
+    "!links by <user> - Show links by specific user",
+    "!links stats - Show statistics",
+    "!ask <question> - Ask the LLM a question",
+    "!context - Show context summary",
+    "!context clear - Clear context for this channel",
+    "!context test <query> - Test context relevance",
+    "!ratelimit - Show rate limit status",
+    "!performance - Show LLM performance stats",
+    "!audit - Show content filter audit statistics",
+    "!privacy - Show privacy filter statistics",
+    "!privacy test <message> - Test privacy filtering",
+    "!privacy clear - Clear privacy mappings (admin only)",
+    "!help - Show this help",
+    "I automatically save any links you share!",
+    "💡 I now use smart context analysis for better AI responses!",
+    "🛡️ Content filtering protects against inappropriate messages!",
+    "🔒 Privacy filtering protects user information sent to LLMs!",
+)
+
+# Link listing messages as (public, private) templates, indexed by _is_private_context()
+NO_LINKS_MSG = ("No links saved yet!", "No links saved in {channel} yet!")
+RECENT_LINKS_HEADER = ("📚 Recent links:", "📚 Recent links from {channel}:")
+DETAILED_LINKS_HEADER = ("📚 Recent links (with details):", "📚 Recent links from {channel} (with details):")
+NO_SEARCH_RESULTS_MSG = ("No links found matching '{query}'", "No links found in {channel} matching '{query}'")
+SEARCH_RESULTS_HEADER = ("🔍 Search results for '{query}':", "🔍 Search results from {channel} for '{query}':")
+NO_USER_LINKS_MSG = ("No links found from user '{username}'", "No links found from user '{username}' in {channel}")
+USER_LINKS_HEADER = ("🔍 Links shared by {username}:", "🔍 Links shared by {username} in {channel}:")
+
+
+def _utf8_prefix(text, budget):
+    """Longest prefix of text that encodes to at most budget UTF-8 bytes, never splitting a character"""
+    return text.encode('utf-8')[:budget].decode('utf-8', 'ignore')
+
+
+def _split_first(text):
+    """Split off the first word, returning (word, rest) with empty strings when missing"""
+    parts = text.split(None, 1)
+    if not parts:
+        return '', ''
+    return parts[0], parts[1] if len(parts) > 1 else ''
+
+
 class AircBot(irc.bot.SingleServerIRCBot):
     def __init__(self):
         # Initialize components
         self.config = Config()
+        # Immutable settings read on every message, cached as plain attributes
+        self._cmd_prefix = self.config.COMMAND_PREFIX
+        self._nick = self.config.IRC_NICKNAME
+        self._nick_lower = self._nick.lower()
+        self._help_lines = self._build_help_lines()
+        self._channel = self.config.IRC_CHANNEL
+        # Nick the server knows us by; cleared on welcome/nick events and re-read on next use
+        self._current_nick = None
+        # Compiled mention pattern, rebuilt only when the current nick changes
+        self._mention_nick = None
+        self._mention_re = None
+        self._mention_names = ()
         self.db = Database(self.config.DATABASE_PATH)
-        self.link_handler = LinkHandler()
+        # Message saves are batched on a background thread to keep the IRC thread responsive
+        self._message_writer = MessageWriter(self.db) if self.config.SAVE_MESSAGES_TO_DB else None
+        self.link_handler = LinkHandler(pool_size=self.config.LINK_WORKERS)
         self.llm_handler = LLMHandler(self.config)
         self.rate_limiter = RateLimiter(
             user_limit_per_minute=self.config.RATE_LIMIT_USER_PER_MINUTE,
@@ -46,78 +198,110 @@ class AircBot(irc.bot.SingleServerIRCBot):
         # Initialize content filter (after LLM handler so it can use local LLM)
         self.content_filter = ContentFilter(self.config, self.llm_handler)
         
-        # Configure SSL context if needed
+        # Matches "<prefix>command rest-of-line" so non-commands are rejected in one C-level match
+        self._cmd_re = re.compile(re.escape(self._cmd_prefix) + r"\s*(\S+)(?:\s+(.*))?$")
+        
+        # Bounded worker pool for link metadata fetches
+        self._link_pool = ThreadPoolExecutor(max_workers=self.config.LINK_WORKERS,
+                                             thread_name_prefix="link")
+        # Separate pool so slow LLM calls can't starve link fetches
+        self._llm_pool = ThreadPoolExecutor(max_workers=self.config.LLM_WORKERS,
+                                            thread_name_prefix="llm")
+        # (channel, url) -> time last scheduled, oldest first
+        self._recent_urls = OrderedDict()
+        # Flood control for multi-line output: each target has its own queue, drained round-robin as
+        # the shared bucket allows, so one long listing can't hold up another target (reactor thread only)
+        self._send_bucket = TokenBucket(SEND_BURST, SEND_BURST / SEND_RATE)
+        self._outboxes = OrderedDict()
+        self._drain_scheduled = False
+        
+        # Configure SSL context if needed; built once (CA bundle loading is slow) and reused on reconnect
+        self._ssl_ctx = None
         ssl_factory = None
         if self.config.IRC_USE_SSL:
-            ssl_context = ssl.create_default_context()
+            self._ssl_ctx = ssl.create_default_context()
             if not self.config.IRC_SSL_VERIFY:
                 # Allow self-signed certificates
-                ssl_context.check_hostname = False
-                ssl_context.verify_mode = ssl.CERT_NONE
+                self._ssl_ctx.check_hostname = False
+                self._ssl_ctx.verify_mode = ssl.CERT_NONE
                 logger.warning("SSL certificate verification disabled - using self-signed certificates")
-            ssl_factory = irc.connection.Factory(wrapper=ssl_context.wrap_socket)
+            ssl_factory = self._make_ssl_factory()
         
         # IRC connection setup
         server = [(self.config.IRC_SERVER, self.config.IRC_PORT)]
         
+        # Only override the library's plain-socket default factory when SSL is on
+        connect_params = {'connect_factory': ssl_factory} if ssl_factory else {}
         super().__init__(server, self.config.IRC_NICKNAME, self.config.IRC_NICKNAME, 
-                         connect_factory=ssl_factory)
+                         **connect_params)
+        
+        # Worker threads hand IRC sends back to the reactor thread through this queue
+        self._reactor_calls = queue.SimpleQueue()
+        self.reactor.scheduler.execute_every(0.1, self._run_reactor_calls)
         
         logger.info(f"Bot initialized for {self.config.IRC_SERVER}:{self.config.IRC_PORT}")
         logger.info(f"SSL enabled: {self.config.IRC_USE_SSL}")
         logger.info(f"SSL verify: {self.config.IRC_SSL_VERIFY}")
         logger.info(f"Will join channel: {self.config.IRC_CHANNEL}")
     
+    def _make_ssl_factory(self):
+        """Connection factory wrapping sockets with the shared SSL context"""
+        wrapper = functools.partial(self._ssl_ctx.wrap_socket, server_hostname=self.config.IRC_SERVER)
+        return irc.connection.Factory(wrapper=wrapper)
+    
     def on_welcome(self, connection, event):
         """Called when we successfully connect to the IRC server"""
         logger.info("Connected to IRC server")
+        self._current_nick = None
         
         # Join the configured channel
-        connection.join(self.config.IRC_CHANNEL)
-        logger.info(f"Joining channel {self.config.IRC_CHANNEL}")
+        connection.join(self._channel)
+        logger.info(f"Joining channel {self._channel}")
     
     def on_join(self, connection, event):
         """Called when someone joins a channel"""
         channel = event.target
         nick = event.source.nick
         
-        if nick == self.config.IRC_NICKNAME:
+        if nick == self._nick:
             logger.info(f"Successfully joined {channel}")
     
     def on_pubmsg(self, connection, event):
         """Called when a public message is received in a channel"""
-        channel = event.target
+        # Interned so the per-user and per-channel dict lookups downstream compare by identity
+        channel = sys.intern(event.target)
         message = event.arguments[0]
-        user = event.source.nick
+        user = sys.intern(event.source.nick)
         
         # Determine message type for context
-        is_command = message.startswith(self.config.COMMAND_PREFIX)
-        is_bot_mention = self.is_bot_mentioned(message)
+        is_command = message.startswith(self._cmd_prefix) and self._cmd_re.match(message) is not None
+        message_lower = message.lower()
+        is_bot_mention = self.is_bot_mentioned(message, message_lower)
         
         # Add message to local context queue
         self.context_manager.add_message(user, channel, message, is_command, is_bot_mention)
         
         # Save message to database if enabled
-        if self.config.SAVE_MESSAGES_TO_DB:
-            self.db.save_message(user, channel, message)
+        if self._message_writer:
+            self._message_writer.put(user, channel, message, time.time())
         
         # Check for commands
         if is_command:
             self.handle_command(connection, channel, user, message)
         # Check if bot is mentioned by name
         elif is_bot_mention:
-            self.handle_name_mention(connection, channel, user, message)
+            self.handle_name_mention(connection, channel, user, message, message_lower)
         
         # Extract and process links
         self.process_links(connection, channel, user, message)
     
     def on_privmsg(self, connection, event):
         """Called when a private message is received"""
-        user = event.source.nick
+        user = sys.intern(event.source.nick)
         message = event.arguments[0]
         
         if not self.config.PRIVATE_MSG_ENABLED:
-            connection.privmsg(user, "Private messaging is disabled. Please use commands in the channel.")
+            self._send_line(connection, user, "Private messaging is disabled. Please use commands in the channel.")
             return
         
         logger.info(f"Private message from {user}: {message}")
@@ -125,26 +309,23 @@ class AircBot(irc.bot.SingleServerIRCBot):
         # Check rate limit for private messages too
         if not self.rate_limiter.is_allowed(user):
             logger.info(f"Rate limited private message from {user}: {message}")
-            connection.privmsg(user, "⏱️ Please wait a moment before sending another message.")
+            self._send_line(connection, user, "⏱️ Please wait a moment before sending another message.")
             return
         
         # Handle commands in private messages
-        if message.startswith(self.config.COMMAND_PREFIX):
+        if self._cmd_re.match(message):
             # For private commands, pass user as "channel" so responses go back to user
             self.handle_command(connection, user, user, message, is_private=True)
         else:
             # Regular conversation - treat as an ask command
             if self.llm_handler.is_enabled():
                 thinking_msg = f"🤖 Thinking about your message..."
-                connection.privmsg(user, thinking_msg)
+                self._send_line(connection, user, thinking_msg)
                 
-                # Process in a separate thread
-                thread = Thread(target=self._process_private_conversation, 
-                              args=(connection, user, message))
-                thread.daemon = True
-                thread.start()
+                # Process on the LLM worker pool
+                self._llm_pool.submit(self._process_private_conversation, connection, user, message)
             else:
-                connection.privmsg(user, "Hi! I can help with link management. Try sending me commands like '!links' or '!help'.")
+                self._send_line(connection, user, "Hi! I can help with link management. Try sending me commands like '!links' or '!help'.")
     
     def _process_private_conversation(self, connection, user, message):
         """Process private conversation using LLM"""
@@ -152,7 +333,8 @@ class AircBot(irc.bot.SingleServerIRCBot):
             # Filter content before processing
             filter_result = self.content_filter.filter_content(message, user, "PRIVATE")
             if not filter_result.is_allowed:
-                connection.privmsg(user, "❌ Your message cannot be processed. Please keep conversations appropriate.")
+                self.call_on_reactor(self._send_line, connection, user,
+                                     "❌ Your message cannot be processed. Please keep conversations appropriate.")
                 logger.warning(f"Blocked private conversation from {user}: {filter_result.reason}")
                 return
             
@@ -162,33 +344,27 @@ class AircBot(irc.bot.SingleServerIRCBot):
             
             if response:
                 cleaned_response = self._clean_response_for_irc(response)
-                self._send_long_message(connection, user, f"🤖 {cleaned_response}")
+                self.call_on_reactor(self._send_long_message, connection, user, f"🤖 {cleaned_response}")
                 logger.info(f"Responded to private conversation with {user}")
             else:
-                connection.privmsg(user, "❌ Sorry, I couldn't process your message right now.")
+                self.call_on_reactor(self._send_line, connection, user, "❌ Sorry, I couldn't process your message right now.")
                 
         except Exception as e:
             logger.error(f"Error in private conversation with {user}: {e}")
-            connection.privmsg(user, "❌ Something went wrong. Please try again later.")
-    
-    def _should_use_private_message(self, is_private):
-        """Determine if we should use private messaging for links commands"""
-        # If the command is already in a private message, don't switch to private
-        # If the command is in a channel and private messaging is enabled, use private
-        return self.config.LINKS_USE_PRIVATE_MSG and not is_private
+            self.call_on_reactor(self._send_line, connection, user, "❌ Something went wrong. Please try again later.")
     
     def _get_source_channel(self, channel, requesting_user=None):
         """Determine the source channel for link operations"""
         # If requesting_user is provided, we're sending to them privately about a channel
         # If channel is a user (private message), always use the configured IRC channel
         if requesting_user or channel == requesting_user or not channel.startswith('#'):
-            return self.config.IRC_CHANNEL
+            return self._channel
         else:
             return channel
     
     def _is_private_context(self, channel, requesting_user=None):
         """Check if we're in a private message context"""
-        return requesting_user or not channel.startswith('#')
+        return bool(requesting_user) or not channel.startswith('#')
     
     def is_admin(self, user: str) -> bool:
         """Check if a user has admin privileges"""
@@ -200,143 +376,185 @@ class AircBot(irc.bot.SingleServerIRCBot):
         # Check rate limit
         if not self.rate_limiter.is_allowed(user):
             logger.info(f"Rate limited command from {user}: {message}")
-            connection.privmsg(channel, f"⏱️ {user}: Please wait a moment before sending another command.")
+            self._send_line(connection, channel, f"⏱️ {user}: Please wait a moment before sending another command.")
             return
         
-        parts = message[1:].split()  # Remove prefix and split
-        command = parts[0].lower()
-        args = parts[1:] if len(parts) > 1 else []
+        match = self._cmd_re.match(message)
+        if not match:
+            return
+        command = match.group(1).lower()
+        # Handlers split off only the words they need; the rest stays one string
+        arg_text = (match.group(2) or '').strip()
         
-        if command == 'links':
-            # Determine if we should use private messaging
-            use_private = self._should_use_private_message(is_private)
-            target_channel = channel if not use_private else user
-            
-            if not args:
-                # Show recent links
-                self.show_recent_links(connection, target_channel, user if use_private else None)
-            elif args[0] == 'search' and len(args) > 1:
-                # Search links
-                query = ' '.join(args[1:])
-                self.search_links(connection, target_channel, query, user if use_private else None)
-            elif args[0] == 'stats':
-                # Show statistics
-                self.show_stats(connection, target_channel, user if use_private else None)
-            elif args[0] == 'details':
-                # Show detailed link information
-                self.show_detailed_links(connection, target_channel, user if use_private else None)
-            elif args[0] == 'by' and len(args) > 1:
-                # Show links by specific user
-                username = args[1]
-                self.show_links_by_user(connection, target_channel, username, user if use_private else None)
-            
-            # If we sent a private message, announce in channel
-            if use_private:
-                connection.privmsg(channel, f"📩 Sent link information to {user} via private message.")
-        
-        elif command == 'help':
-            # Determine if we should use private messaging
-            use_private = self.config.COMMANDS_USE_PRIVATE_MSG and not is_private
-            target_channel = channel if not use_private else user
-            self.show_help(connection, target_channel)
-            if use_private:
-                connection.privmsg(channel, f"📩 Sent help information to {user} via private message.")
-        
-        elif command == 'ratelimit' or command == 'rl':
-            # Determine if we should use private messaging
-            use_private = self.config.COMMANDS_USE_PRIVATE_MSG and not is_private
-            target_channel = channel if not use_private else user
-            self.show_rate_limit_stats(connection, target_channel, user)
-            if use_private:
-                connection.privmsg(channel, f"📩 Sent rate limit info to {user} via private message.")
-        
-        elif command == 'performance' or command == 'perf':
-            # Determine if we should use private messaging
-            use_private = self.config.COMMANDS_USE_PRIVATE_MSG and not is_private
-            target_channel = channel if not use_private else user
-            self.show_performance_stats(connection, target_channel)
-            if use_private:
-                connection.privmsg(channel, f"📩 Sent performance stats to {user} via private message.")
-        
-        elif command == 'context':
-            # Determine if we should use private messaging
-            use_private = self.config.COMMANDS_USE_PRIVATE_MSG and not is_private
-            target_channel = channel if not use_private else user
-            
-            if not args:
-                # Show context summary
-                self.show_context_summary(connection, target_channel)
-                if use_private:
-                    connection.privmsg(channel, f"📩 Sent context summary to {user} via private message.")
-            elif args[0] == 'clear':
-                # Clear context for this channel - this should always be public
-                self.context_manager.clear_channel_context(channel)
-                connection.privmsg(channel, f"🧹 Context cleared for {channel}")
-            elif args[0] == 'test' and len(args) > 1:
-                # Test context relevance for a query
-                query = ' '.join(args[1:])
-                self.test_context_relevance(connection, target_channel, query)
-                if use_private:
-                    connection.privmsg(channel, f"📩 Sent context test results to {user} via private message.")
-        
-        elif command == 'ask':
-            if args:
-                # Join all arguments as the question
-                question = ' '.join(args)
-                self.handle_ask_command(connection, channel, user, question)
-            else:
-                connection.privmsg(channel, "Usage: !ask <your question>")
-        
-        elif command == 'audit':
-            # Show content filter audit statistics (admin-like feature)
-            use_private = self.config.COMMANDS_USE_PRIVATE_MSG and not is_private
-            target_channel = channel if not use_private else user
-            self.show_audit_stats(connection, target_channel)
-            if use_private:
-                connection.privmsg(channel, f"📩 Sent audit stats to {user} via private message.")
-        
-        elif command == 'privacy':
-            # Show privacy filter statistics and controls
-            use_private = self.config.COMMANDS_USE_PRIVATE_MSG and not is_private
-            target_channel = channel if not use_private else user
+        spec = self._COMMANDS.get(command)
+        if spec is None:
+            return
+        
+        # Determine if we should use private messaging
+        use_private = bool(spec.private_setting) and getattr(self.config, spec.private_setting) and not is_private
+        target_channel = user if use_private else channel
+        sent = getattr(self, spec.handler)(connection, channel, target_channel, user, arg_text)
+        
+        # If we sent a private message, announce in channel
+        if use_private and sent:
+            self._send_line(connection, channel, f"📩 Sent {sent} to {user} via private message.")
+    
+    # Command name -> CommandSpec. Handlers take (connection, channel, target_channel, user, arg_text)
+    # and return a description of what was sent to target_channel, or None if nothing was.
+    _COMMANDS = {
+        'links': CommandSpec('_cmd_links', 'LINKS_USE_PRIVATE_MSG'),
+        'help': CommandSpec('_cmd_help', 'COMMANDS_USE_PRIVATE_MSG'),
+        'ratelimit': CommandSpec('_cmd_ratelimit', 'COMMANDS_USE_PRIVATE_MSG'),
+        'rl': CommandSpec('_cmd_ratelimit', 'COMMANDS_USE_PRIVATE_MSG'),
+        'performance': CommandSpec('_cmd_performance', 'COMMANDS_USE_PRIVATE_MSG'),
+        'perf': CommandSpec('_cmd_performance', 'COMMANDS_USE_PRIVATE_MSG'),
+        'context': CommandSpec('_cmd_context', 'COMMANDS_USE_PRIVATE_MSG'),
+        'ask': CommandSpec('_cmd_ask', None),
+        'audit': CommandSpec('_cmd_audit', 'COMMANDS_USE_PRIVATE_MSG'),
+        'privacy': CommandSpec('_cmd_privacy', 'COMMANDS_USE_PRIVATE_MSG'),
+    }
+    
+    # !links subcommand -> (handler method, whether an argument is required)
+    _LINKS_SUB = {
+        'search': ('_links_search', True),
+        'stats': ('_links_stats', False),
+        'details': ('_links_details', False),
+        'by': ('_links_by', True),
+    }
+    
+    def _cmd_links(self, connection, channel, target_channel, user, arg_text):
+        requesting_user = user if target_channel != channel else None
+        
+        if not arg_text:
+            # Show recent links
+            self.show_recent_links(connection, target_channel, requesting_user)
+        else:
+            subcommand, rest = _split_first(arg_text)
+            sub = self._LINKS_SUB.get(subcommand)
+            if sub and (rest or not sub[1]):
+                getattr(self, sub[0])(connection, target_channel, rest, requesting_user)
+        return "link information"
+    
+    def _links_search(self, connection, target_channel, rest, requesting_user):
+        self.search_links(connection, target_channel, rest, requesting_user)
+    
+    def _links_stats(self, connection, target_channel, rest, requesting_user):
+        self.show_stats(connection, target_channel, requesting_user)
+    
+    def _links_details(self, connection, target_channel, rest, requesting_user):
+        self.show_detailed_links(connection, target_channel, requesting_user)
+    
+    def _links_by(self, connection, target_channel, rest, requesting_user):
+        self.show_links_by_user(connection, target_channel, _split_first(rest)[0], requesting_user)
+    
+    def _cmd_help(self, connection, channel, target_channel, user, arg_text):
+        self.show_help(connection, target_channel)
+        return "help information"
+    
+    def _cmd_ratelimit(self, connection, channel, target_channel, user, arg_text):
+        self.show_rate_limit_stats(connection, target_channel, user)
+        return "rate limit info"
+    
+    def _cmd_performance(self, connection, channel, target_channel, user, arg_text):
+        self.show_performance_stats(connection, target_channel)
+        return "performance stats"
+    
+    def _cmd_context(self, connection, channel, target_channel, user, arg_text):
+        subcommand, query = _split_first(arg_text)
+        if not subcommand:
+            # Show context summary
+            self.show_context_summary(connection, target_channel)
+            return "context summary"
+        elif subcommand == 'clear':
+            # Clear context for this channel - this should always be public
+            self.context_manager.clear_channel_context(channel)
+            self._send_line(connection, channel, f"🧹 Context cleared for {channel}")
+        elif subcommand == 'test' and query:
+            # Test context relevance for a query
+            self.test_context_relevance(connection, target_channel, query)
+            return "context test results"
+    
+    def _cmd_ask(self, connection, channel, target_channel, user, arg_text):
+        if arg_text:
+            # Everything after the command is the question
+            self.handle_ask_command(connection, channel, user, arg_text)
+        else:
+            self._send_line(connection, channel, "Usage: !ask <your question>")
+    
+    def _cmd_audit(self, connection, channel, target_channel, user, arg_text):
+        # Show content filter audit statistics (admin-like feature)
+        self.show_audit_stats(connection, target_channel)
+        return "audit stats"
+    
+    def _cmd_privacy(self, connection, channel, target_channel, user, arg_text):
+        # Show privacy filter statistics and controls
+        subcommand, sample_content = _split_first(arg_text)
+        if not subcommand:
+            # Show privacy stats
+            self.show_privacy_stats(connection, target_channel, channel)
+            return "privacy stats"
+        elif subcommand == 'test' and sample_content:
+            # Test privacy filtering on a sample message
+            self.test_privacy_filtering(connection, target_channel, channel, user, sample_content)
+            return "privacy test results"
+        elif subcommand == 'clear':
+            # Clear privacy mappings for this channel (admin feature)
+            if not self.is_admin(user):
+                self._send_line(connection, channel, f"❌ {user}: Only bot administrators can clear privacy data.")
+                logger.warning(f"Non-admin user {user} attempted to clear privacy data")
+                return
             
-            if not args:
-                # Show privacy stats
-                self.show_privacy_stats(connection, target_channel, channel)
-                if use_private:
-                    connection.privmsg(channel, f"📩 Sent privacy stats to {user} via private message.")
-            elif args[0] == 'test' and len(args) > 1:
-                # Test privacy filtering on a sample message
-                sample_content = ' '.join(args[1:])
-                self.test_privacy_filtering(connection, target_channel, channel, user, sample_content)
-                if use_private:
-                    connection.privmsg(channel, f"📩 Sent privacy test results to {user} via private message.")
-            elif args[0] == 'clear':
-                # Clear privacy mappings for this channel (admin feature)
-                if not self.is_admin(user):
-                    connection.privmsg(channel, f"❌ {user}: Only bot administrators can clear privacy data.")
-                    logger.warning(f"Non-admin user {user} attempted to clear privacy data")
-                    return
-                
-                self.clear_privacy_data(connection, channel)
-                connection.privmsg(channel, f"🧹 Privacy data cleared for {channel} (if any)")
+            self.clear_privacy_data(connection, channel)
+            self._send_line(connection, channel, f"🧹 Privacy data cleared for {channel} (if any)")
+    
+    def call_on_reactor(self, func, *args):
+        """Schedule func(*args) to run on the IRC reactor thread (safe to call from any thread)"""
+        self._reactor_calls.put((func, args))
+    
+    def _run_reactor_calls(self):
+        """Run queued cross-thread calls; invoked periodically by the reactor scheduler"""
+        while True:
+            try:
+                func, args = self._reactor_calls.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                func(*args)
+            except Exception as e:
+                logger.error(f"Error in reactor callback {func}: {e}")
     
     def process_links(self, connection, channel, user, message):
         """Extract and save links from messages"""
         urls = self.link_handler.extract_urls(message)
+        if not urls:
+            return
         
-        for url in urls:
-            # Process link in a separate thread to avoid blocking
-            thread = Thread(target=self._process_single_link, 
-                          args=(connection, channel, user, url))
-            thread.daemon = True
-            thread.start()
+        now = time.monotonic()
+        recent = self._recent_urls
+        for url in dict.fromkeys(urls):  # Drop duplicates within the message, keep order
+            key = (channel, url)
+            seen = recent.get(key)
+            if seen is not None and now - seen < RECENT_URL_TTL:
+                logger.debug("Skipping recently processed link: %s", url)
+                continue
+            recent[key] = now
+            recent.move_to_end(key)
+            if len(recent) > RECENT_URL_MAX:
+                recent.popitem(last=False)
+            
+            # Process link on the worker pool to avoid blocking
+            self._link_pool.submit(self._process_single_link, connection, channel, user, url)
     
     def _process_single_link(self, connection, channel, user, url):
-        """Process a single link (runs in separate thread)"""
+        """Process a single link (runs on the link worker pool)"""
         try:
             logger.info(f"Processing link: {url}")
             
+            # Skip the metadata fetch entirely for links this channel already has
+            if self.db.link_exists(url, channel):
+                logger.info(f"Link already exists: {url}")
+                return
+            
             # Get metadata
             title, description = self.link_handler.get_link_metadata(url)
             
@@ -345,10 +563,8 @@ class AircBot(irc.bot.SingleServerIRCBot):
             
             if saved:
                 # Announce the saved link
-                response = f"📎 Saved: {title}"
-                if len(response) > 300:  # IRC message length limit
-                    response = response[:297] + "..."
-                connection.privmsg(channel, response)
+                response = self._fit(f"📎 Saved: {title}", 300)  # IRC message length limit
+                self.call_on_reactor(self._send_line, connection, channel, response)
                 logger.info(f"Saved link: {url} - {title}")
             else:
                 logger.info(f"Link already exists: {url}")
@@ -356,6 +572,61 @@ class AircBot(irc.bot.SingleServerIRCBot):
         except Exception as e:
             logger.error(f"Error processing link {url}: {e}")
     
+    def _fit(self, text, budget=400):
+        """Truncate text to at most budget UTF-8 bytes (IRC limits are in bytes, not characters)"""
+        if len(text.encode('utf-8')) <= budget:
+            return text
+        return _utf8_prefix(text, budget - 3) + "..."
+    
+    def _privmsg(self, connection, target, line):
+        """Send one line with privmsg, logging and skipping it if the library rejects it"""
+        # Also runs from scheduler callbacks, so a rejected line must not escape into the reactor
+        try:
+            connection.privmsg(target, line)
+        except (irc.client.MessageTooLong, irc.client.InvalidCharacters,
+                irc.client.ServerNotConnectedError) as e:
+            logger.warning(f"Dropped reply to {target}: {e}")
+    
+    def _send_line(self, connection, target, line):
+        """Send a single-line reply (notice, warning, error) right away, ahead of any queued listing"""
+        # Counted against the bucket so queued output slows down accordingly, but never delayed itself
+        self._send_bucket.refill(time.monotonic())
+        self._send_bucket.tokens -= 1
+        self._privmsg(connection, target, line)
+    
+    def _send_lines(self, connection, target, lines):
+        """Queue lines behind earlier output to the same target and send what the bucket allows (reactor thread)"""
+        key = (connection, target)
+        pending = self._outboxes.get(key)
+        if pending is None:
+            pending = self._outboxes[key] = deque()
+        pending.extend(lines)
+        self._drain_outbox()
+    
+    def _drain_outbox(self):
+        """Send queued lines while tokens last, one per target in turn; reschedule for the rest"""
+        bucket = self._send_bucket
+        bucket.refill(time.monotonic())
+        outboxes = self._outboxes
+        while outboxes and bucket.tokens >= 1:
+            key = next(iter(outboxes))
+            pending = outboxes[key]
+            bucket.tokens -= 1
+            self._privmsg(*key, pending.popleft())
+            if pending:
+                outboxes.move_to_end(key)
+            else:
+                del outboxes[key]
+        
+        if outboxes and not self._drain_scheduled:
+            self._drain_scheduled = True
+            self.reactor.scheduler.execute_after((1 - bucket.tokens) / bucket.rate, self._scheduled_drain)
+    
+    def _scheduled_drain(self):
+        """Scheduler callback: continue sending queued lines once tokens have refilled"""
+        self._drain_scheduled = False
+        self._drain_outbox()
+    
     def show_recent_links(self, connection, channel, requesting_user=None):
         """Show recent links in the channel"""
         source_channel = self._get_source_channel(channel, requesting_user)
@@ -363,21 +634,13 @@ class AircBot(irc.bot.SingleServerIRCBot):
         links = self.db.get_recent_links(source_channel, limit=self.config.LINKS_RECENT_LIMIT)
         
         if not links:
-            msg = "No links saved yet!"
-            if is_private_context:
-                msg = f"No links saved in {source_channel} yet!"
-            connection.privmsg(channel, msg)
+            self._send_line(connection, channel, NO_LINKS_MSG[is_private_context].format(channel=source_channel))
             return
         
-        intro_msg = "📚 Recent links:"
-        if is_private_context:
-            intro_msg = f"📚 Recent links from {source_channel}:"
-        connection.privmsg(channel, intro_msg)
+        lines = [RECENT_LINKS_HEADER[is_private_context].format(channel=source_channel)]
         for link in links:
-            msg = f"• {link['title']} (by {link['user']}) - {link['url']}"
-            if len(msg) > 400:
-                msg = msg[:397] + "..."
-            connection.privmsg(channel, msg)
+            lines.append(self._fit(f"• {link['title']} (by {link['user']}) - {link['url']}"))
+        self._send_lines(connection, channel, lines)
     
     def search_links(self, connection, channel, query, requesting_user=None):
         """Search for links matching a query"""
@@ -386,21 +649,13 @@ class AircBot(irc.bot.SingleServerIRCBot):
         links = self.db.search_links(source_channel, query, limit=self.config.LINKS_SEARCH_LIMIT)
         
         if not links:
-            msg = f"No links found matching '{query}'"
-            if is_private_context:
-                msg = f"No links found in {source_channel} matching '{query}'"
-            connection.privmsg(channel, msg)
+            self._send_line(connection, channel, NO_SEARCH_RESULTS_MSG[is_private_context].format(channel=source_channel, query=query))
             return
         
-        intro_msg = f"🔍 Search results for '{query}':"
-        if is_private_context:
-            intro_msg = f"🔍 Search results from {source_channel} for '{query}':"
-        connection.privmsg(channel, intro_msg)
+        lines = [SEARCH_RESULTS_HEADER[is_private_context].format(channel=source_channel, query=query)]
         for link in links:
-            msg = f"• {link['title']} (by {link['user']}) - {link['url']}"
-            if len(msg) > 400:
-                msg = msg[:397] + "..."
-            connection.privmsg(channel, msg)
+            lines.append(self._fit(f"• {link['title']} (by {link['user']}) - {link['url']}"))
+        self._send_lines(connection, channel, lines)
     
     def show_stats(self, connection, channel, requesting_user=None):
         """Show link statistics"""
@@ -408,47 +663,25 @@ class AircBot(irc.bot.SingleServerIRCBot):
         is_private_context = self._is_private_context(channel, requesting_user)
         stats = self.db.get_link_stats(source_channel)
         
-        msg = f"📊 Stats"
-        if is_private_context:
-            msg += f" for {source_channel}"
-        msg += f": {stats.get('total_links', 0)} links saved by {stats.get('unique_users', 0)} users"
+        scope = f" for {source_channel}" if is_private_context else ""
+        top = ""
         if 'top_contributor' in stats:
-            msg += f" (top: {stats['top_contributor']} with {stats['top_contributor_count']} links)"
+            top = f" (top: {stats['top_contributor']} with {stats['top_contributor_count']} links)"
         
-        connection.privmsg(channel, msg)
+        self._send_line(connection, channel, f"📊 Stats{scope}: {stats.get('total_links', 0)} links saved by {stats.get('unique_users', 0)} users{top}")
     
-    def show_help(self, connection, channel):
-        """Show help information"""
-        help_text = [
-            "🤖 AircBot Commands:",
-            "!links - Show recent links",
-            "!links details - Show recent links with timestamps",
-            "!links search <term> - Search saved links",
-            "!links by <user> - Show links by specific user",
-            "!links stats - Show statistics",
-            "!ask <question> - Ask the LLM a question",
-            "!context - Show context summary",
-            "!context clear - Clear context for this channel",
-            "!context test <query> - Test context relevance",
-            "!ratelimit - Show rate limit status",
-            "!performance - Show LLM performance stats",
-            "!audit - Show content filter audit statistics",
-            "!privacy - Show privacy filter statistics",
-            "!privacy test <message> - Test privacy filtering",
-            "!privacy clear - Clear privacy mappings (admin only)",
-            "!help - Show this help",
-            "I automatically save any links you share!",
-            "💡 I now use smart context analysis for better AI responses!",
-            "🛡️ Content filtering protects against inappropriate messages!",
-            "🔒 Privacy filtering protects user information sent to LLMs!",
+    def _build_help_lines(self):
+        """Build the full help text; the config is fixed for the life of the process"""
+        return HELP_LINES + (
             f"📩 Most commands send responses privately{' (disabled)' if not self.config.COMMANDS_USE_PRIVATE_MSG else ''}",
             f"💬 !ask responses stay public for community benefit",
             f"💬 You can also message me directly for private conversations{' (disabled)' if not self.config.PRIVATE_MSG_ENABLED else ''}",
             f"Rate limits: {self.config.RATE_LIMIT_USER_PER_MINUTE}/min per user, {self.config.RATE_LIMIT_TOTAL_PER_MINUTE}/min total"
-        ]
-        
-        for line in help_text:
-            connection.privmsg(channel, line)
+        )
+    
+    def show_help(self, connection, channel):
+        """Show help information"""
+        self._send_lines(connection, channel, self._help_lines)
     
     def show_rate_limit_stats(self, connection, channel, user):
         """Show rate limiting statistics"""
@@ -456,20 +689,22 @@ class AircBot(irc.bot.SingleServerIRCBot):
         stats = self.rate_limiter.get_stats()
         user_stats = self.rate_limiter.get_user_stats(user)
         
-        connection.privmsg(channel, f"⏱️ Rate Limit Status:")
-        connection.privmsg(channel, f"• Total requests this minute: {stats['total_requests_this_minute']}/{stats['total_limit']}")
-        connection.privmsg(channel, f"• Active users: {stats['active_users']}")
-        connection.privmsg(channel, f"• {user}: {user_stats['requests_this_minute']}/{user_stats['limit']} (remaining: {user_stats['remaining']})")
+        self._send_lines(connection, channel, [
+            f"⏱️ Rate Limit Status:",
+            f"• Total requests this minute: {stats['total_requests_this_minute']}/{stats['total_limit']}",
+            f"• Active users: {stats['active_users']}",
+            f"• {user}: {user_stats['requests_this_minute']}/{user_stats['limit']} (remaining: {user_stats['remaining']})",
+        ])
     
     def show_performance_stats(self, connection, channel):
         """Show LLM performance statistics"""
         if not self.llm_handler.is_enabled():
-            connection.privmsg(channel, "❌ LLM is not available - no performance stats.")
+            self._send_line(connection, channel, "❌ LLM is not available - no performance stats.")
             return
         
         stats = self.llm_handler.get_performance_stats()
         
-        connection.privmsg(channel, f"📊 LLM Performance Stats (Mode: {stats['mode']}):")
+        lines = [f"📊 LLM Performance Stats (Mode: {stats['mode']}):"]
         
         # Show stats for each enabled client
         for client_type in ['local', 'openai']:
@@ -493,40 +728,48 @@ class AircBot(irc.bot.SingleServerIRCBot):
                     daily_remaining = client_stats['daily_remaining']
                     line += f" | Daily: {daily_usage}/{daily_limit} (remaining: {daily_remaining})"
                 
-                connection.privmsg(channel, line)
+                lines.append(line)
         
         # Show overall stats
         overall = stats['overall']
         if overall['total_requests'] > 0:
-            connection.privmsg(channel, f"• Overall: {overall['total_requests']} total, {overall['total_failed']} failed")
+            lines.append(f"• Overall: {overall['total_requests']} total, {overall['total_failed']} failed")
+        
+        self._send_lines(connection, channel, lines)
     
     def on_disconnect(self, connection, event):
         """Called when disconnected from server"""
-        logger.warning(f"Disconnected from IRC server: {event}")
-        logger.warning(f"Event type: {event.type}")
-        logger.warning(f"Event source: {event.source}")
-        logger.warning(f"Event target: {event.target}")
-        logger.warning(f"Event arguments: {event.arguments}")
+        logger.warning("Disconnected from IRC server: %s", event)
+        logger.warning("Event type: %s", event.type)
+        logger.warning("Event source: %s", event.source)
+        logger.warning("Event target: %s", event.target)
+        logger.warning("Event arguments: %s", event.arguments)
         if hasattr(event, 'error'):
-            logger.error(f"Disconnect error: {event.error}")
+            logger.error("Disconnect error: %s", event.error)
     
     def on_error(self, connection, event):
         """Called when an error occurs"""
-        logger.error(f"IRC Error: {event}")
-        logger.error(f"Error type: {event.type}")
-        logger.error(f"Error source: {event.source}")
-        logger.error(f"Error target: {event.target}")
-        logger.error(f"Error arguments: {event.arguments}")
+        logger.error("IRC Error: %s", event)
+        logger.error("Error type: %s", event.type)
+        logger.error("Error source: %s", event.source)
+        logger.error("Error target: %s", event.target)
+        logger.error("Error arguments: %s", event.arguments)
     
     def on_ctcp(self, connection, event):
         """Handle CTCP events"""
-        logger.debug(f"CTCP event: {event}")
+        logger.debug("CTCP event: %s", event)
+    
+    def on_nick(self, connection, event):
+        """Forget the cached nick when ours changes"""
+        if self._current_nick is not None and irc.strings.lower(event.source.nick) == irc.strings.lower(self._current_nick):
+            self._current_nick = None
     
     def on_nicknameinuse(self, connection, event):
         """Handle nickname in use"""
-        logger.warning(f"Nickname '{self.config.IRC_NICKNAME}' is in use")
+        logger.warning(f"Nickname '{self._nick}' is in use")
         # Try with underscore
-        new_nick = self.config.IRC_NICKNAME + "_"
+        new_nick = self._nick + "_"
+        self._current_nick = None
         logger.info(f"Trying nickname: {new_nick}")
         connection.nick(new_nick)
     
@@ -556,7 +799,9 @@ class AircBot(irc.bot.SingleServerIRCBot):
     
     def on_all_raw_messages(self, connection, event):
         """Log all raw IRC messages for debugging"""
-        logger.debug(f"RAW IRC: {event.type} - {event.source} - {event.target} - {event.arguments}")
+        # Runs for every line from the server, so skip all formatting work unless DEBUG is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("RAW IRC: %s - %s - %s - %s", event.type, event.source, event.target, event.arguments)
     
     def show_detailed_links(self, connection, channel, requesting_user=None):
         """Show recent links with detailed information (user, timestamp)"""
@@ -565,29 +810,21 @@ class AircBot(irc.bot.SingleServerIRCBot):
         links = self.db.get_links_with_details(source_channel, limit=self.config.LINKS_DETAILS_LIMIT)
         
         if not links:
-            msg = "No links saved yet!"
-            if is_private_context:
-                msg = f"No links saved in {source_channel} yet!"
-            connection.privmsg(channel, msg)
+            self._send_line(connection, channel, NO_LINKS_MSG[is_private_context].format(channel=source_channel))
             return
         
-        intro_msg = "📚 Recent links (with details):"
-        if is_private_context:
-            intro_msg = f"📚 Recent links from {source_channel} (with details):"
-        connection.privmsg(channel, intro_msg)
+        lines = [DETAILED_LINKS_HEADER[is_private_context].format(channel=source_channel)]
         for link in links:
-            msg = f"• {link['title']}"
-            msg += f" | 👤 {link['user']}"
-            msg += f" | 🕐 {link['formatted_time']}"
-            msg += f" | 🔗 {link['url']}"
+            msg = f"• {link['title']} | 👤 {link['user']} | 🕐 {link['formatted_time']} | 🔗 {link['url']}"
             
             # Split long messages
-            if len(msg) > 400:
-                connection.privmsg(channel, f"• {link['title']}")
-                connection.privmsg(channel, f"  👤 {link['user']} | 🕐 {link['formatted_time']}")
-                connection.privmsg(channel, f"  🔗 {link['url']}")
+            if len(msg.encode('utf-8')) > 400:
+                lines.append(f"• {link['title']}")
+                lines.append(f"  👤 {link['user']} | 🕐 {link['formatted_time']}")
+                lines.append(f"  🔗 {link['url']}")
             else:
-                connection.privmsg(channel, msg)
+                lines.append(msg)
+        self._send_lines(connection, channel, lines)
     
     def show_links_by_user(self, connection, channel, username, requesting_user=None):
         """Show all links shared by a specific user"""
@@ -596,58 +833,59 @@ class AircBot(irc.bot.SingleServerIRCBot):
         links = self.db.get_all_links_by_user(source_channel, username)
         
         if not links:
-            msg = f"No links found from user '{username}'"
-            if is_private_context:
-                msg += f" in {source_channel}"
-            connection.privmsg(channel, msg)
+            self._send_line(connection, channel, NO_USER_LINKS_MSG[is_private_context].format(channel=source_channel, username=username))
             return
         
-        intro_msg = f"🔍 Links shared by {username}:"
-        if is_private_context:
-            intro_msg = f"🔍 Links shared by {username} in {source_channel}:"
-        connection.privmsg(channel, intro_msg)
+        lines = [USER_LINKS_HEADER[is_private_context].format(channel=source_channel, username=username)]
         for link in links[:self.config.LINKS_BY_USER_LIMIT]:  # Limit to avoid spam
             msg = f"• {link['title']} | 🕐 {link['formatted_time']} | 🔗 {link['url']}"
-            if len(msg) > 400:
-                connection.privmsg(channel, f"• {link['title']}")
-                connection.privmsg(channel, f"  🕐 {link['formatted_time']} | 🔗 {link['url']}")
+            if len(msg.encode('utf-8')) > 400:
+                lines.append(f"• {link['title']}")
+                lines.append(f"  🕐 {link['formatted_time']} | 🔗 {link['url']}")
             else:
-                connection.privmsg(channel, msg)
+                lines.append(msg)
         
         if len(links) > self.config.LINKS_BY_USER_LIMIT:
-            connection.privmsg(channel, f"... and {len(links) - self.config.LINKS_BY_USER_LIMIT} more links")
+            lines.append(f"... and {len(links) - self.config.LINKS_BY_USER_LIMIT} more links")
+        self._send_lines(connection, channel, lines)
     
     def handle_ask_command(self, connection, channel, user, question, show_thinking=True):
         """Handle !ask command - query the LLM with optional context"""
         if not self.llm_handler.is_enabled():
-            connection.privmsg(channel, "❌ LLM is not available. Check configuration.")
+            self._send_line(connection, channel, "❌ LLM is not available. Check configuration.")
             return
         
-        # Filter content before processing
-        filter_result = self.content_filter.filter_content(question, user, channel)
+        # Filter content before processing (pattern checks here; the slower LLM check runs on the pool)
+        filter_result = self.content_filter.filter_content(question, user, channel, use_llm=False)
         if not filter_result.is_allowed:
-            # Don't reveal the exact reason to avoid giving hints to bad actors
-            connection.privmsg(channel, f"❌ {user}: Your message cannot be processed. Please keep discussions appropriate.")
-            logger.warning(f"Blocked ask command from {user} in {channel}: {filter_result.reason}")
+            self._reject_ask(connection, channel, user, filter_result)
             return
         
         # Indicate we're thinking (unless already shown)
         if show_thinking:
             thinking_msg = get_thinking_message(user, question[:100])
-            connection.privmsg(channel, thinking_msg)
+            self._send_line(connection, channel, thinking_msg)
         
-        # Process in a separate thread to avoid blocking
-        thread = Thread(target=self._process_ask_request, 
-                      args=(connection, channel, user, question))
-        thread.daemon = True
-        thread.start()
+        # Process on the LLM worker pool to avoid blocking
+        self._llm_pool.submit(self._process_ask_request, connection, channel, user, question)
+    
+    def _reject_ask(self, connection, channel, user, filter_result):
+        """Tell the user their question was blocked (reactor thread; workers use call_on_reactor)"""
+        # Don't reveal the exact reason to avoid giving hints to bad actors
+        self._send_line(connection, channel, f"❌ {user}: Your message cannot be processed. Please keep discussions appropriate.")
+        logger.warning(f"Blocked ask command from {user} in {channel}: {filter_result.reason}")
     
     def _process_ask_request(self, connection, channel, user, question):
-        """Process the LLM request in a separate thread"""
+        """Process the LLM request (runs on the LLM worker pool)"""
         # Start timing the total request processing
         start_time = time.time()
         
         try:
+            filter_result = self.content_filter.filter_with_llm(question, user, channel)
+            if not filter_result.is_allowed:
+                self.call_on_reactor(self._reject_ask, connection, channel, user, filter_result)
+                return
+            
             # Get intelligent context from local message queue
             context_messages = self.context_manager.get_relevant_context(channel, question)
             context_str = ""
@@ -672,38 +910,29 @@ class AircBot(irc.bot.SingleServerIRCBot):
                 # Clean the response for IRC (remove carriage returns and normalize whitespace)
                 cleaned_response = self._clean_response_for_irc(response)
                 # Split long responses across multiple messages
-                self._send_long_message(connection, channel, f"🤖 {cleaned_response}")
+                self.call_on_reactor(self._send_long_message, connection, channel, f"🤖 {cleaned_response}")
                 logger.info(f"Total request processing time for '{question[:30]}...': {total_time:.2f}s")
             else:
-                connection.privmsg(channel, "❌ No response from LLM")
+                self.call_on_reactor(self._send_line, connection, channel, "❌ No response from LLM")
                 logger.warning(f"No response from LLM for '{question[:30]}...' after {total_time:.2f}s")
                 
         except Exception as e:
             total_time = time.time() - start_time
             logger.error(f"Error processing ask request '{question[:30]}...' after {total_time:.2f}s: {e}")
-            connection.privmsg(channel, f"❌ Error processing request: {str(e)}")
+            self.call_on_reactor(self._send_line, connection, channel, f"❌ Error processing request: {str(e)}")
     
     def _clean_response_for_irc(self, response: str) -> str:
         """Clean LLM response for IRC compatibility"""
         # Remove thinking tags that some models include
-        import re
-        response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
+        response = THINK_TAG_RE.sub('', response)
         
-        # Replace various newline characters with spaces
-        response = response.replace('\r\n', ' ').replace('\r', ' ').replace('\n', ' ')
-        
-        # Replace multiple spaces with single spaces
-        response = re.sub(r'\s+', ' ', response)
-        
-        # Strip leading/trailing whitespace
-        response = response.strip()
-        
-        return response
+        # Collapse all whitespace (including \r and \n) to single spaces and strip the ends
+        return ' '.join(response.split())
     
     def _send_long_message(self, connection, channel, message, max_length=400):
-        """Split long messages into multiple IRC messages"""
-        if len(message) <= max_length:
-            connection.privmsg(channel, message)
+        """Split long messages into IRC lines of at most max_length bytes (reactor thread; workers use call_on_reactor)"""
+        if len(message.encode('utf-8')) <= max_length:
+            self._send_line(connection, channel, message)
             return
         
         # Split on sentences or lines first, then by length
@@ -711,63 +940,60 @@ class AircBot(irc.bot.SingleServerIRCBot):
         remaining = message
         
         while remaining:
-            if len(remaining) <= max_length:
+            if len(remaining.encode('utf-8')) <= max_length:
                 parts.append(remaining)
                 break
             
-            # Try to split at sentence boundary
-            split_point = max_length
-            for punct in ['. ', '! ', '? ']:
-                punct_pos = remaining.rfind(punct, 0, max_length)
-                if punct_pos > max_length // 2:  # Don't split too early
-                    split_point = punct_pos + len(punct)
-                    break
-            
-            # If no good split point, just cut at max length
-            if split_point == max_length:
-                split_point = max_length
+            # Try to split at the last sentence boundary, otherwise just cut at max length;
+            # the limit is in bytes, so non-ASCII text gets fewer characters per line
+            split_point = max(len(_utf8_prefix(remaining, max_length)), 1)
+            last = None
+            for last in SENTENCE_END_RE.finditer(remaining, 0, split_point):
+                pass
+            if last and last.start() > split_point // 2:  # Don't split too early
+                split_point = last.end()
             
             parts.append(remaining[:split_point])
             remaining = remaining[split_point:].lstrip()
         
-        # Send each part
-        for i, part in enumerate(parts):
-            if i > 0:
-                time.sleep(0.5)  # Small delay between messages
-            connection.privmsg(channel, part)
+        self._send_lines(connection, channel, parts)
     
-    def is_bot_mentioned(self, message: str) -> bool:
+    def _get_current_nick(self, connection) -> str:
+        """Current nick, asked from the connection only after it may have changed"""
+        if self._current_nick is None:
+            self._current_nick = connection.get_nickname()
+        return self._current_nick
+    
+    def _get_mention_regex(self, current_nick: str):
+        """Return the compiled mention pattern for the current nick, rebuilding it only on a nick change"""
+        if current_nick != self._mention_nick or self._mention_re is None:
+            # Current nick (might have _ appended if original was taken), configured name and bot name
+            names = dict.fromkeys((current_nick.lower(), self._nick_lower, "aircbot"))
+            self._mention_names = tuple(names)
+            self._mention_re = re.compile(rf'\b(?:{"|".join(map(re.escape, names))})\b', re.IGNORECASE)
+            self._mention_nick = current_nick
+        return self._mention_re
+    
+    def is_bot_mentioned(self, message: str, message_lower: Optional[str] = None) -> bool:
         """Check if the bot is mentioned in the message"""
-        message_lower = message.lower()
-        
-        # Get the current nickname (might have _ appended if original was taken)
-        current_nick = self.connection.get_nickname().lower()
-        
-        # Check for various mention patterns with word boundaries
-        mention_patterns = [
-            rf'\b{re.escape(current_nick)}\b',  # Current nick with word boundaries
-            rf'\b{re.escape(self.config.IRC_NICKNAME.lower())}\b',  # Original configured name
-            r'\baircbot\b',  # Bot name with word boundaries
-        ]
-        
-        # Check if any of the patterns appear in the message
-        for pattern in mention_patterns:
-            if re.search(pattern, message_lower):
-                return True
-        
-        return False
+        mention_re = self._get_mention_regex(self._get_current_nick(self.connection))
+        if message_lower is None:
+            message_lower = message.lower()
+        # Plain substring checks reject most chat; the regex only confirms word boundaries
+        if not any(name in message_lower for name in self._mention_names):
+            return False
+        return mention_re.search(message) is not None
     
-    def handle_name_mention(self, connection, channel, user, message):
+    def handle_name_mention(self, connection, channel, user, message, message_lower=None):
         """Handle when the bot is mentioned by name with rate limiting"""
         # Check rate limit
         if not self.rate_limiter.is_allowed(user):
             logger.info(f"Rate limited mention from {user}: {message}")
-            connection.privmsg(channel, f"⏱️ {user}: Please wait a moment before mentioning me again.")
+            self._send_line(connection, channel, f"⏱️ {user}: Please wait a moment before mentioning me again.")
             return
         
-        # Extract the part of the message that's not the bot name
-        message_lower = message.lower()
-        current_nick = connection.get_nickname().lower()
+        if message_lower is None:
+            message_lower = message.lower()
         
         # Check for capabilities question in the original message first
         if self._is_asking_for_capabilities(message_lower):
@@ -775,10 +1001,7 @@ class AircBot(irc.bot.SingleServerIRCBot):
             return
         
         # Remove bot name mentions to get the actual question/comment
-        clean_message = message
-        mention_patterns = [current_nick, self.config.IRC_NICKNAME.lower(), "aircbot"]
-        mention_regex = re.compile(rf'\b(?:{"|".join(map(re.escape, mention_patterns))})\b', re.IGNORECASE)
-        clean_message = mention_regex.sub("", clean_message)
+        clean_message = self._get_mention_regex(self._get_current_nick(connection)).sub("", message)
         
         # Clean up punctuation and whitespace
         clean_message = clean_message.strip(" ,:;!?")
@@ -794,81 +1017,40 @@ class AircBot(irc.bot.SingleServerIRCBot):
             else:
                 # Treat it as an ask command
                 thinking_msg = get_thinking_message(user, clean_message[:100])
-                connection.privmsg(channel, thinking_msg)
+                self._send_line(connection, channel, thinking_msg)
                 self.handle_ask_command(connection, channel, user, clean_message, show_thinking=False)
         else:
             # Just a mention without a question - provide help
-            responses = [
-                f"Hi {user}! I'm here to help. Try !ask <question> or !help for commands.",
-                f"Yes {user}? I can answer questions with !ask or save your links automatically.",
-                f"Hello {user}! Use !help to see what I can do, or just ask me something with !ask.",
-            ]
-            import random
-            response = random.choice(responses)
-            connection.privmsg(channel, response)
-    
-    def _is_asking_for_capabilities(self, message: str) -> bool:
-        """Check if the user is asking about the bot's capabilities or what it can do"""
-        capability_phrases = [
-            "what can you do", "what do you do", "what are you for",
-            "what are your capabilities", "what are your features",
-            "what can you help with", "what can you help me with",
-            "how can you help", "what commands", "what functions",
-            "what are your commands", "what are your functions",
-            "help me", "show help", "tell me what you do",
-            "what's your purpose", "what is your purpose",
-            "how do you work", "what do you offer"
-        ]
-        
-        message_lower = message.lower().strip()
-        
-        # Check for exact or partial matches
-        for phrase in capability_phrases:
-            if phrase in message_lower:
-                return True
-        
+            self._send_line(connection, channel, random.choice(MENTION_REPLIES).format(user=user))
+    
+    def _is_asking_for_capabilities(self, message_lower: str) -> bool:
+        """Check if the user is asking about the bot's capabilities (expects lowercased text)"""
         # Check if it's just "help" or "capabilities"
-        stripped = message_lower.strip(" ?!.,;:")
-        if stripped in ["help", "capabilities", "commands", "functions", "purpose"]:
+        if message_lower.strip(EDGE_PUNCTUATION) in CAPABILITY_WORDS:
             return True
-            
-        return False
+        
+        # Check for exact or partial matches of any phrase in one scan
+        return CAPABILITY_PHRASES_RE.search(message_lower) is not None
     
     def _is_asking_for_links(self, message: str) -> bool:
         """Check if the user is asking for links"""
         # Check for explicit compound phrases first (these are always link requests)
-        explicit_phrases = [
-            "saved links", "recent links", "show links", "get links", 
-            "list links", "what links", "any links", "share links",
-            "links you saved", "links you have", "links stats",
-            "links statistics", "detailed links"
-        ]
-        
-        for phrase in explicit_phrases:
-            if phrase in message:
-                return True
+        if any(phrase in message for phrase in EXPLICIT_LINK_PHRASES):
+            return True
         
         # Check if message is just "links" or "links?" - treat as request
-        stripped = message.strip(" ?!.,;:")
-        if stripped == "links" or stripped == "link":
+        stripped = message.strip(EDGE_PUNCTUATION)
+        if stripped in ("links", "link"):
             return True
         
         # For single word "links", need to have action words AND proper context
         if "links" in message:
-            action_words = ["show", "get", "give", "list", "what", "any", "have", "share", "find", "search", "stats", "statistics", "detailed", "need", "want"]
-            has_action_word = any(word in message for word in action_words)
+            has_action_word = any(word in message for word in LINK_ACTION_WORDS)
             
             if has_action_word:
                 # Check for question/request patterns
-                patterns = [
-                    r'(?:what|any|show|get|have|share|find|search|need|want).*\blinks?\b',
-                    r'\blinks?\b.*(?:you|saved|recent|have|stats|statistics|detailed)',
-                    r'(?:stats|statistics|detailed).*\blinks?\b'
-                ]
-                
-                import re
-                for pattern in patterns:
-                    if re.search(pattern, message):
+                for pattern in LINK_REQUEST_PATTERNS:
+                    if pattern.search(message):
                         return True
                         
         return False
@@ -878,9 +1060,8 @@ class AircBot(irc.bot.SingleServerIRCBot):
         # Parse the request to determine what type of links command to run
         if any(word in message for word in ["search", "find", "look for"]):
             # Extract search term
-            import re
             # Look for search patterns like "search for X" or "find X links"
-            search_match = re.search(r'(?:search|find|look for)\s+(.+?)(?:\s+links?|$)', message)
+            search_match = LINK_SEARCH_RE.search(message)
             if search_match:
                 search_term = search_match.group(1).strip()
                 self.search_links(connection, channel, search_term)
@@ -888,8 +1069,7 @@ class AircBot(irc.bot.SingleServerIRCBot):
         
         if any(word in message for word in ["by", "from", "user", "shared by"]):
             # Extract username
-            import re
-            user_match = re.search(r'(?:by|from|shared by)\s+(\w+)', message)
+            user_match = LINK_USER_RE.search(message)
             if user_match:
                 username = user_match.group(1)
                 self.show_links_by_user(connection, channel, username)
@@ -908,38 +1088,22 @@ class AircBot(irc.bot.SingleServerIRCBot):
     
     def _handle_capability_request(self, connection, channel, user):
         """Handle requests about the bot's capabilities"""
-        capability_messages = [
+        capability_messages = (
             f"🤖 Hi {user}! Here's what I can do:",
-            "📎 I automatically save any links you share in the channel",
-            "💬 You can mention me or ask me questions and I'll respond using AI",
-            "🔍 Link management commands:",
-            "  • !links - Show recent links",
-            "  • !links search <term> - Search saved links",
-            "  • !links by <user> - Show links by specific user",
-            "  • !links stats - Show statistics",
-            "  • !links details - Show recent links with timestamps",
-            "🤖 AI commands:",
-            "  • !ask <question> - Ask me anything",
-            "  • Just mention my name and ask a question",
-            "📊 Utility commands:",
-            "  • !ratelimit - Check rate limit status",
-            "  • !performance - Show AI performance stats",
-            "  • !help - Show command help",
-            f"📩 Most commands send responses privately to keep the channel clean",
-            f"💬 !ask responses stay public for everyone's benefit",
+            *CAPABILITY_LINES,
             f"⚡ Rate limits: {self.config.RATE_LIMIT_USER_PER_MINUTE}/min per user, {self.config.RATE_LIMIT_TOTAL_PER_MINUTE}/min total"
-        ]
+        )
         
-        for msg in capability_messages:
-            connection.privmsg(channel, msg)
-            time.sleep(0.3)  # Small delay between messages to avoid flooding
+        # Paced by the send bucket via the reactor's scheduler, so the IRC thread keeps
+        # processing other messages in between
+        self._send_lines(connection, channel, capability_messages)
     
     def show_context_summary(self, connection, channel):
         """Show context summary for the current channel"""
         summary = self.context_manager.get_context_summary(channel)
         
         if summary['total_messages'] == 0:
-            connection.privmsg(channel, "📝 No messages in context queue yet.")
+            self._send_line(connection, channel, "📝 No messages in context queue yet.")
             return
         
         # Format timestamps
@@ -947,29 +1111,31 @@ class AircBot(irc.bot.SingleServerIRCBot):
         oldest = datetime.datetime.fromtimestamp(summary['oldest_timestamp']).strftime("%H:%M")
         newest = datetime.datetime.fromtimestamp(summary['newest_timestamp']).strftime("%H:%M")
         
-        connection.privmsg(channel, f"📝 Context Summary for {channel}:")
-        connection.privmsg(channel, f"• Messages in queue: {summary['total_messages']}/{self.config.MESSAGE_QUEUE_SIZE}")
-        connection.privmsg(channel, f"• Unique users: {summary['unique_users']}")
-        connection.privmsg(channel, f"• Commands: {summary['commands']}")
-        connection.privmsg(channel, f"• Bot mentions: {summary['bot_mentions']}")
-        connection.privmsg(channel, f"• Time range: {oldest} - {newest}")
-        connection.privmsg(channel, f"• Context analysis: {'enabled' if self.config.CONTEXT_ANALYSIS_ENABLED else 'disabled'}")
-        connection.privmsg(channel, f"• Relevance threshold: {self.config.CONTEXT_RELEVANCE_THRESHOLD}")
+        self._send_lines(connection, channel, [
+            f"📝 Context Summary for {channel}:",
+            f"• Messages in queue: {summary['total_messages']}/{self.config.MESSAGE_QUEUE_SIZE}",
+            f"• Unique users: {summary['unique_users']}",
+            f"• Commands: {summary['commands']}",
+            f"• Bot mentions: {summary['bot_mentions']}",
+            f"• Time range: {oldest} - {newest}",
+            f"• Context analysis: {'enabled' if self.config.CONTEXT_ANALYSIS_ENABLED else 'disabled'}",
+            f"• Relevance threshold: {self.config.CONTEXT_RELEVANCE_THRESHOLD}",
+        ])
     
     def test_context_relevance(self, connection, channel, query):
         """Test context relevance for a given query"""
         if not self.config.CONTEXT_ANALYSIS_ENABLED:
-            connection.privmsg(channel, "❌ Context analysis is disabled")
+            self._send_line(connection, channel, "❌ Context analysis is disabled")
             return
         
         # Get relevant context
         relevant_messages = self.context_manager.get_relevant_context(channel, query, max_messages=5)
         
         if not relevant_messages:
-            connection.privmsg(channel, f"🔍 No relevant context found for: '{query}'")
+            self._send_line(connection, channel, f"🔍 No relevant context found for: '{query}'")
             return
         
-        connection.privmsg(channel, f"🔍 Found {len(relevant_messages)} relevant messages for: '{query}'")
+        lines = [f"🔍 Found {len(relevant_messages)} relevant messages for: '{query}'"]
         
         for i, msg in enumerate(relevant_messages, 1):
             # Calculate age
@@ -983,7 +1149,8 @@ class AircBot(irc.bot.SingleServerIRCBot):
             
             # Truncate message for display
             content = msg.content[:80] + "..." if len(msg.content) > 80 else msg.content
-            connection.privmsg(channel, f"  {i}. [{age_str}] {msg.user}: {content}")
+            lines.append(f"  {i}. [{age_str}] {msg.user}: {content}")
+        self._send_lines(connection, channel, lines)
 
     def show_audit_stats(self, connection, channel):
         """Show content filter audit statistics"""
@@ -991,25 +1158,29 @@ class AircBot(irc.bot.SingleServerIRCBot):
             # Get audit stats for last 24 hours
             stats = self.content_filter.get_audit_stats(24)
             
-            connection.privmsg(channel, f"🛡️ Content Filter Audit (Last 24h):")
-            connection.privmsg(channel, f"• Total blocked attempts: {stats['total_blocked']}")
+            lines = [
+                f"🛡️ Content Filter Audit (Last 24h):",
+                f"• Total blocked attempts: {stats['total_blocked']}",
+            ]
             
             if stats['by_filter_type']:
-                connection.privmsg(channel, "• Blocked by type:")
+                lines.append("• Blocked by type:")
                 for filter_type, count in stats['by_filter_type'].items():
-                    connection.privmsg(channel, f"  - {filter_type}: {count}")
+                    lines.append(f"  - {filter_type}: {count}")
             
             if stats['top_users']:
-                connection.privmsg(channel, "• Top offenders:")
+                lines.append("• Top offenders:")
                 for user, count in list(stats['top_users'].items())[:3]:
-                    connection.privmsg(channel, f"  - {user}: {count} attempts")
+                    lines.append(f"  - {user}: {count} attempts")
             
             if stats['total_blocked'] == 0:
-                connection.privmsg(channel, "✅ No inappropriate content blocked in the last 24 hours!")
+                lines.append("✅ No inappropriate content blocked in the last 24 hours!")
+            
+            self._send_lines(connection, channel, lines)
                 
         except Exception as e:
             logger.error(f"Error showing audit stats: {e}")
-            connection.privmsg(channel, "❌ Error retrieving audit statistics.")
+            self._send_line(connection, channel, "❌ Error retrieving audit statistics.")
     
     def show_privacy_stats(self, connection, channel, source_channel):
         """Show privacy filter statistics"""
@@ -1017,28 +1188,30 @@ class AircBot(irc.bot.SingleServerIRCBot):
             privacy_stats = self.context_manager.get_privacy_stats(source_channel)
             
             if not privacy_stats["privacy_enabled"]:
-                connection.privmsg(channel, "🔒 Privacy filtering is not enabled.")
+                self._send_line(connection, channel, "🔒 Privacy filtering is not enabled.")
                 return
             
-            connection.privmsg(channel, f"🔒 Privacy Stats for {source_channel}:")
-            connection.privmsg(channel, f"• Privacy Level: {privacy_stats.get('privacy_level', 'unknown')}")
-            connection.privmsg(channel, f"• Active Users: {privacy_stats.get('active_users', 0)}")
-            connection.privmsg(channel, f"• Mapped Users: {privacy_stats.get('mapped_users', 0)}")
-            connection.privmsg(channel, f"• Max Channel Size: {privacy_stats.get('max_channel_users', 0)}")
-            
             privacy_applied = privacy_stats.get('privacy_applied', False)
             status = "✅ Applied" if privacy_applied else "⚠️ Skipped (channel too large)"
-            connection.privmsg(channel, f"• Privacy Status: {status}")
+            
+            self._send_lines(connection, channel, [
+                f"🔒 Privacy Stats for {source_channel}:",
+                f"• Privacy Level: {privacy_stats.get('privacy_level', 'unknown')}",
+                f"• Active Users: {privacy_stats.get('active_users', 0)}",
+                f"• Mapped Users: {privacy_stats.get('mapped_users', 0)}",
+                f"• Max Channel Size: {privacy_stats.get('max_channel_users', 0)}",
+                f"• Privacy Status: {status}",
+            ])
             
         except Exception as e:
             logger.error(f"Error showing privacy stats: {e}")
-            connection.privmsg(channel, "❌ Error retrieving privacy statistics.")
+            self._send_line(connection, channel, "❌ Error retrieving privacy statistics.")
     
     def test_privacy_filtering(self, connection, channel, source_channel, requesting_user, sample_content):
         """Test the privacy filtering on a sample message"""
         try:
             if not self.context_manager.privacy_filter:
-                connection.privmsg(channel, "🔒 Privacy filtering is not enabled.")
+                self._send_line(connection, channel, "🔒 Privacy filtering is not enabled.")
                 return
             
             # Get known users from the channel
@@ -1049,33 +1222,47 @@ class AircBot(irc.bot.SingleServerIRCBot):
                 sample_content, requesting_user, source_channel, known_users
             )
             
-            connection.privmsg(channel, f"🔒 Privacy Filter Test for {source_channel}:")
-            connection.privmsg(channel, f"• Original: {sample_content}")
-            connection.privmsg(channel, f"• Sanitized: {sanitized_content}")
-            connection.privmsg(channel, f"• Your username: {requesting_user} → {anon_username}")
-            connection.privmsg(channel, f"• Known users in channel: {len(known_users)}")
+            self._send_lines(connection, channel, [
+                f"🔒 Privacy Filter Test for {source_channel}:",
+                f"• Original: {sample_content}",
+                f"• Sanitized: {sanitized_content}",
+                f"• Your username: {requesting_user} → {anon_username}",
+                f"• Known users in channel: {len(known_users)}",
+            ])
             
         except Exception as e:
             logger.error(f"Error testing privacy filter: {e}")
-            connection.privmsg(channel, "❌ Error testing privacy filter.")
+            self._send_line(connection, channel, "❌ Error testing privacy filter.")
     
     def clear_privacy_data(self, connection, channel):
         """Clear privacy mappings for a channel"""
         try:
             if not self.context_manager.privacy_filter:
-                connection.privmsg(channel, "🔒 Privacy filtering is not enabled.")
+                self._send_line(connection, channel, "🔒 Privacy filtering is not enabled.")
                 return
             
             self.context_manager.privacy_filter.clear_channel_data(channel)
-            connection.privmsg(channel, f"🧹 Privacy data cleared for {channel}")
+            self._send_line(connection, channel, f"🧹 Privacy data cleared for {channel}")
             logger.info(f"Privacy data cleared for {channel}")
             
         except Exception as e:
             logger.error(f"Error clearing privacy data: {e}")
-            connection.privmsg(channel, "❌ Error clearing privacy data.")
+            self._send_line(connection, channel, "❌ Error clearing privacy data.")
+
+    def shutdown_workers(self):
+        """Stop background workers, flushing any queued message saves"""
+        # Let running link and LLM jobs finish before the database they write to is closed
+        self._link_pool.shutdown(wait=True)
+        self._llm_pool.shutdown(wait=True)
+        if self._message_writer:
+            self._message_writer.close()
+        self.db.close()
+        # Only after the LLM pool has drained, so no filter_with_llm call is still logging audit rows
+        self.content_filter.close()
 
 def main():
     """Main entry point"""
+    bot = None
     try:
         bot = AircBot()
         logger.info("Starting bot...")
@@ -1085,12 +1272,16 @@ def main():
         bot.start()
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
+        if bot:
+            bot.shutdown_workers()
         sys.exit(0)
     except Exception as e:
         logger.error(f"Bot crashed with exception: {e}")
         logger.error(f"Exception type: {type(e).__name__}")
         import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
+        if bot:
+            bot.shutdown_workers()
         sys.exit(1)
 
 if __name__ == "__main__":
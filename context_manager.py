@@ -5,9 +5,10 @@ Handles local message queues and intelligent context relevance detection
 """
 
 import time
+import heapq
 import re
-from collections import deque
-from dataclasses import dataclass
+from collections import Counter, deque, namedtuple
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple, Set
 import logging
 
@@ -20,6 +21,34 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Word tokens for keyword overlap (same matches as r'\b\w+\b')
+_WORD_RE = re.compile(r'\w+')
+
+# Query words that mark a request for links, and content substrings that look like links
+LINK_QUERY_WORDS = ('link', 'url', 'resource', 'site', 'website')
+LINK_CONTENT_MARKERS = ('http', 'https', 'www', '.com', '.org', '.net')
+
+# Question words, a question mark, or a request verb; one alternation so detection is a single search
+QUESTION_RE = re.compile(
+    r'\?'
+    r'|\b(?:what|why|how|when|where|who|which|can|could|would|should|is|are|was|were|do|does|did)\b'
+    r'|\b(?:explain|tell me|show me|help|describe|define)\b',
+    re.IGNORECASE
+)
+
+# Keywords that indicate technical/informational context (matched as substrings)
+TECHNICAL_KEYWORDS = frozenset([
+    'code', 'programming', 'python', 'javascript', 'error', 'bug', 'function', 'method',
+    'class', 'variable', 'database', 'server', 'api', 'http', 'ssl', 'github', 'git',
+    'install', 'configuration', 'config', 'setup', 'deployment', 'docker', 'kubernetes',
+    'algorithm', 'data', 'structure', 'framework', 'library', 'package', 'module',
+    'syntax', 'compile', 'debug', 'test', 'testing', 'performance', 'optimization',
+    'security', 'authentication', 'authorization', 'encryption', 'hash', 'token'
+])
+
+# Everything about a query that relevance scoring needs, computed once per get_relevant_context call
+QueryFeatures = namedtuple('QueryFeatures', ['words', 'tech', 'is_question', 'wants_links', 'now'])
+
 @dataclass
 class Message:
     """Represents a chat message with metadata"""
@@ -29,6 +58,40 @@ class Message:
     timestamp: float
     is_command: bool = False
     is_bot_mention: bool = False
+    
+    # Derived from content once, so relevance scoring doesn't repeat the string work for every query
+    words: frozenset = field(init=False, repr=False, compare=False)
+    tech: frozenset = field(init=False, repr=False, compare=False)
+    is_question: bool = field(init=False, repr=False, compare=False)
+    has_link: bool = field(init=False, repr=False, compare=False)
+    is_short: bool = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        content_lower = self.content.lower()
+        self.words = frozenset(_WORD_RE.findall(content_lower))
+        self.tech = frozenset(kw for kw in TECHNICAL_KEYWORDS if kw in content_lower)
+        self.is_question = QUESTION_RE.search(self.content) is not None
+        self.has_link = any(marker in content_lower for marker in LINK_CONTENT_MARKERS)
+        self.is_short = len(self.content.strip()) < 10
+
+@dataclass
+class ChannelStats:
+    """Running totals over a channel's message queue, updated as messages enter and leave"""
+    users: Counter = field(default_factory=Counter)
+    commands: int = 0
+    mentions: int = 0
+    
+    def add(self, message: Message):
+        self.users[message.user] += 1
+        self.commands += message.is_command
+        self.mentions += message.is_bot_mention
+    
+    def remove(self, message: Message):
+        self.users[message.user] -= 1
+        if not self.users[message.user]:
+            del self.users[message.user]
+        self.commands -= message.is_command
+        self.mentions -= message.is_bot_mention
 
 class ContextManager:
     """Manages message context for intelligent LLM interactions"""
@@ -37,6 +100,8 @@ class ContextManager:
         self.config = config
         # Channel -> deque of Message objects
         self.message_queues: Dict[str, deque] = {}
+        # Channel -> running summary of that queue, so get_context_summary doesn't rescan it
+        self._channel_stats: Dict[str, ChannelStats] = {}
         
         # Initialize privacy filter if enabled and available
         self.privacy_filter = None
@@ -51,28 +116,19 @@ class ContextManager:
             self.privacy_filter = PrivacyFilter(privacy_config)
             logger.info(f"Privacy filter initialized with level: {privacy_config.privacy_level}")
         
-        # Compile regex patterns for efficiency
-        self._question_patterns = [
-            re.compile(r'\b(?:what|why|how|when|where|who|which|can|could|would|should|is|are|was|were|do|does|did)\b', re.IGNORECASE),
-            re.compile(r'\?', re.IGNORECASE),
-            re.compile(r'\b(?:explain|tell me|show me|help|describe|define)\b', re.IGNORECASE),
-        ]
-        
-        # Keywords that indicate technical/informational context
-        self._technical_keywords = [
-            'code', 'programming', 'python', 'javascript', 'error', 'bug', 'function', 'method',
-            'class', 'variable', 'database', 'server', 'api', 'http', 'ssl', 'github', 'git',
-            'install', 'configuration', 'config', 'setup', 'deployment', 'docker', 'kubernetes',
-            'algorithm', 'data', 'structure', 'framework', 'library', 'package', 'module',
-            'syntax', 'compile', 'debug', 'test', 'testing', 'performance', 'optimization',
-            'security', 'authentication', 'authorization', 'encryption', 'hash', 'token'
-        ]
+        # Shared, module-level matchers (also used to precompute Message features)
+        self._question_re = QUESTION_RE
+        self._technical_keywords = TECHNICAL_KEYWORDS
     
     def add_message(self, user: str, channel: str, content: str, is_command: bool = False, is_bot_mention: bool = False):
         """Add a message to the channel's queue"""
         # Initialize queue for new channels
         if channel not in self.message_queues:
             self.message_queues[channel] = deque(maxlen=self.config.MESSAGE_QUEUE_SIZE)
+            self._channel_stats[channel] = ChannelStats()
+        queue = self.message_queues[channel]
+        if queue.maxlen == 0:
+            return
         
         message = Message(
             user=user,
@@ -83,8 +139,14 @@ class ContextManager:
             is_bot_mention=is_bot_mention
         )
         
-        self.message_queues[channel].append(message)
-        logger.debug(f"Added message to {channel} queue: {user}: {content[:50]}...")
+        stats = self._channel_stats[channel]
+        if len(queue) == queue.maxlen:
+            # The append below evicts the oldest message
+            stats.remove(queue[0])
+        queue.append(message)
+        stats.add(message)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Added message to {channel} queue: {user}: {content[:50]}...")
     
     def get_relevant_context(self, channel: str, query: str, max_messages: Optional[int] = None) -> List[Message]:
         """
@@ -105,23 +167,24 @@ class ContextManager:
             return []
         
         max_msgs = max_messages or self.config.MAX_CONTEXT_MESSAGES
+        # Snapshot the deque: this runs on the LLM worker pool while the IRC thread keeps
+        # appending, and iterating a deque that is mutated mid-loop raises RuntimeError
         messages = list(self.message_queues[channel])
         
         if not messages:
             return []
         
         # Score all messages for relevance
+        query_features = self._prepare_query(query)
         scored_messages = []
         for msg in messages:
-            score = self._calculate_relevance_score(query, msg)
+            score = self._calculate_relevance_score(query_features, msg)
             if score >= self.config.CONTEXT_RELEVANCE_THRESHOLD:
                 scored_messages.append((score, msg))
         
-        # Sort by relevance score (descending) then by timestamp (ascending for chronological order)
-        scored_messages.sort(key=lambda x: (-x[0], x[1].timestamp))
-        
-        # Return top relevant messages, limited by max_messages
-        relevant_messages = [msg for score, msg in scored_messages[:max_msgs]]
+        # Top messages by relevance score (descending) then by timestamp (ascending), without sorting them all
+        top_scored = heapq.nsmallest(max_msgs, scored_messages, key=lambda x: (-x[0], x[1].timestamp))
+        relevant_messages = [msg for score, msg in top_scored]
         
         # Sort the final result chronologically
         relevant_messages.sort(key=lambda x: x.timestamp)
@@ -138,49 +201,49 @@ class ContextManager:
         messages = list(self.message_queues[channel])
         return messages[-limit:] if messages else []
     
-    def _calculate_relevance_score(self, query: str, message: Message) -> float:
+    def _prepare_query(self, query: str) -> QueryFeatures:
+        """Extract the query-side features used by _calculate_relevance_score"""
+        query_lower = query.lower()
+        return QueryFeatures(
+            words=frozenset(_WORD_RE.findall(query_lower)),
+            tech=frozenset(kw for kw in self._technical_keywords if kw in query_lower),
+            is_question=self._is_question(query),
+            wants_links=any(word in query_lower for word in LINK_QUERY_WORDS),
+            now=time.time()
+        )
+    
+    def _calculate_relevance_score(self, query: QueryFeatures, message: Message) -> float:
         """
-        Calculate relevance score between a query and a message
+        Calculate relevance score between a prepared query and a message
         
         Returns:
             Float between 0.0 and 1.0 indicating relevance
         """
         score = 0.0
-        query_lower = query.lower()
-        content_lower = message.content.lower()
         
         # 1. Direct keyword overlap (weighted by config)
-        query_words = set(re.findall(r'\b\w+\b', query_lower))
-        content_words = set(re.findall(r'\b\w+\b', content_lower))
-        
-        if query_words and content_words:
-            overlap = len(query_words.intersection(content_words))
-            keyword_score = overlap / len(query_words)
+        if query.words:
+            overlap = len(query.words & message.words)
+            keyword_score = overlap / len(query.words)
             score += keyword_score * self.config.WEIGHT_KEYWORD_OVERLAP
         
         # 2. Technical keyword bonus (weighted by config)
-        query_has_tech = any(keyword in query_lower for keyword in self._technical_keywords)
-        content_has_tech = any(keyword in content_lower for keyword in self._technical_keywords)
-        
-        if query_has_tech and content_has_tech:
-            # Find specific technical keywords that match
-            matching_tech = [kw for kw in self._technical_keywords 
-                           if kw in query_lower and kw in content_lower]
+        if query.tech:
+            # Count the query's technical keywords that also appear in the message
+            matching_tech = len(query.tech & message.tech)
             if matching_tech:
-                tech_bonus = min(self.config.WEIGHT_TECHNICAL_KEYWORDS, len(matching_tech) * 0.1)
+                tech_bonus = min(self.config.WEIGHT_TECHNICAL_KEYWORDS, matching_tech * 0.1)
                 score += tech_bonus
         
         # 3. Question context bonus (weighted by config)
-        query_is_question = self._is_question(query)
-        content_is_question = self._is_question(message.content)
-        
-        if query_is_question and content_is_question:
-            score += self.config.WEIGHT_QUESTION_CONTEXT  # Related questions are often relevant
-        elif query_is_question and not content_is_question:
-            score += self.config.WEIGHT_QUESTION_CONTEXT * 0.67  # Statements can answer questions (reduced weight)
+        if query.is_question:
+            if message.is_question:
+                score += self.config.WEIGHT_QUESTION_CONTEXT  # Related questions are often relevant
+            else:
+                score += self.config.WEIGHT_QUESTION_CONTEXT * 0.67  # Statements can answer questions (reduced weight)
         
         # 4. Recency bonus (weighted by config)
-        age_minutes = (time.time() - message.timestamp) / 60
+        age_minutes = (query.now - message.timestamp) / 60
         if age_minutes < 30:  # Last 30 minutes
             recency_bonus = max(0, self.config.WEIGHT_RECENCY_BONUS * (1 - age_minutes / 30))
             score += recency_bonus
@@ -194,22 +257,18 @@ class ContextManager:
         # For now, we'll skip this but it could be added later
         
         # 7. Length penalty for very short messages (configurable penalty)
-        if len(message.content.strip()) < 10:
+        if message.is_short:
             score *= self.config.PENALTY_SHORT_MESSAGE
         
         # 8. URL/link bonus if query is about links or resources (weighted by config)
-        if any(word in query_lower for word in ['link', 'url', 'resource', 'site', 'website']):
-            if any(word in content_lower for word in ['http', 'https', 'www', '.com', '.org', '.net']):
-                score += self.config.WEIGHT_URL_BONUS
+        if query.wants_links and message.has_link:
+            score += self.config.WEIGHT_URL_BONUS
         
         return min(1.0, score)  # Cap at 1.0
     
     def _is_question(self, text: str) -> bool:
         """Check if a text appears to be a question"""
-        for pattern in self._question_patterns:
-            if pattern.search(text):
-                return True
-        return False
+        return self._question_re.search(text) is not None
     
     def get_context_summary(self, channel: str) -> Dict:
         """Get summary statistics about the message queue for a channel"""
@@ -223,8 +282,8 @@ class ContextManager:
                 'newest_timestamp': None
             }
         
-        messages = list(self.message_queues[channel])
-        if not messages:
+        queue = self.message_queues[channel]
+        if not queue:
             return {
                 'total_messages': 0,
                 'unique_users': 0,
@@ -234,23 +293,21 @@ class ContextManager:
                 'newest_timestamp': None
             }
         
-        users = set(msg.user for msg in messages)
-        commands = sum(1 for msg in messages if msg.is_command)
-        mentions = sum(1 for msg in messages if msg.is_bot_mention)
-        
+        stats = self._channel_stats[channel]
         return {
-            'total_messages': len(messages),
-            'unique_users': len(users),
-            'commands': commands,
-            'bot_mentions': mentions,
-            'oldest_timestamp': messages[0].timestamp,
-            'newest_timestamp': messages[-1].timestamp
+            'total_messages': len(queue),
+            'unique_users': len(stats.users),
+            'commands': stats.commands,
+            'bot_mentions': stats.mentions,
+            'oldest_timestamp': queue[0].timestamp,
+            'newest_timestamp': queue[-1].timestamp
         }
     
     def clear_channel_context(self, channel: str):
         """Clear the message queue for a specific channel"""
         if channel in self.message_queues:
             self.message_queues[channel].clear()
+            self._channel_stats[channel] = ChannelStats()
             logger.info(f"Cleared message context for channel {channel}")
     
     def get_channel_users(self, channel: str) -> Set[str]:
@@ -258,7 +315,7 @@ class ContextManager:
         if channel not in self.message_queues:
             return set()
         
-        return {msg.user for msg in self.message_queues[channel]}
+        return set(self._channel_stats[channel].users)
     
     def format_context_for_llm(self, messages: List[Message]) -> str:
         """Format a list of messages for inclusion in LLM context with privacy protection"""
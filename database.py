@@ -1,11 +1,111 @@
 import sqlite3
 import os
 import logging
+import queue
+import re
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Tuple, Callable
 
 logger = logging.getLogger(__name__)
 
+# SQL is kept in module constants so each statement text is built once and
+# hits the per-connection prepared-statement cache on every call
+INSERT_LINK_SQL = '''
+    INSERT INTO links (url, title, description, user, channel, timestamp)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+'''
+
+INSERT_MESSAGE_SQL = '''
+    INSERT INTO messages (user, channel, message)
+    VALUES (?, ?, ?)
+'''
+
+INSERT_MESSAGE_AT_SQL = '''
+    INSERT INTO messages (user, channel, message, timestamp)
+    VALUES (?, ?, ?, datetime(?, 'unixepoch'))
+'''
+
+LINK_EXISTS_SQL = '''
+    SELECT 1 FROM links WHERE url = ? AND channel = ? LIMIT 1
+'''
+
+RECENT_LINKS_SQL = '''
+    SELECT url, title, user, timestamp
+    FROM links
+    WHERE channel = ?
+    ORDER BY timestamp DESC, rowid DESC
+    LIMIT ?
+'''
+
+SEARCH_LINKS_FTS_SQL = '''
+    SELECT l.url, l.title, l.user, l.timestamp
+    FROM links_fts
+    JOIN links l ON l.id = links_fts.rowid
+    WHERE links_fts MATCH ? AND l.channel = ?
+    ORDER BY links_fts.rank
+    LIMIT ?
+'''
+
+SEARCH_LINKS_LIKE_SQL = '''
+    SELECT url, title, user, timestamp
+    FROM links
+    WHERE channel = ? AND (title LIKE ? OR url LIKE ?)
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+LINK_COUNTS_SQL = '''
+    SELECT COUNT(*) as total_links,
+           COUNT(DISTINCT user) as unique_users
+    FROM links
+    WHERE channel = ?
+'''
+
+TOP_CONTRIBUTORS_SQL = '''
+    SELECT user, COUNT(*) as count
+    FROM links
+    WHERE channel = ?
+    GROUP BY user
+    ORDER BY count DESC
+    LIMIT ?
+'''
+
+LINKS_WITH_DETAILS_SQL = '''
+    SELECT url, title, description, user, channel, 
+           datetime(timestamp, 'localtime') as formatted_time,
+           timestamp
+    FROM links
+    WHERE channel = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+ALL_LINKS_BY_USER_SQL = '''
+    SELECT url, title, user, datetime(timestamp, 'localtime') as formatted_time
+    FROM links
+    WHERE channel = ? AND user = ?
+    ORDER BY timestamp DESC
+'''
+
+LINKS_BY_USER_SQL = '''
+    SELECT url, title, user, timestamp
+    FROM links
+    WHERE channel = ? AND user = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+# Words in a search query, each quoted as a literal FTS term
+_FTS_WORD_RE = re.compile(r'\w+')
+
+# The trigram tokenizer (SQLite 3.34+) lets the FTS index answer substring searches; older
+# builds index whole words and match them by prefix instead
+_FTS_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+_FTS_TOKENIZER = 'trigram' if _FTS_TRIGRAM else 'unicode61'
+
 class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
@@ -17,11 +117,45 @@ class Database:
             except (OSError, PermissionError) as e:
                 logger.error(f"Cannot create database directory {db_dir}: {e}")
                 raise
+        
+        # One long-lived writer connection shared by all threads (serialized by _lock)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+            PRAGMA cache_size=-20000;
+        ''')
+        self._lock = threading.Lock()
         self.init_database()
+        
+        # Separate read-only connection so link queries don't queue behind writes under WAL
+        if db_path == ':memory:':
+            self._reader, self._read_lock = self.conn, self._lock
+        else:
+            reader_uri = Path(db_path).absolute().as_uri() + '?mode=ro'
+            self._reader = sqlite3.connect(reader_uri, uri=True, check_same_thread=False)
+            self._reader.executescript('PRAGMA temp_store=MEMORY; PRAGMA cache_size=-20000;')
+            self._read_lock = threading.Lock()
+        self._reader.row_factory = sqlite3.Row
+    
+    def close(self):
+        """Close the database connections"""
+        with self._read_lock:
+            self._reader.close()
+        if self._reader is not self.conn:
+            with self._lock:
+                self.conn.close()
+    
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict]:
+        """Run a read query and return rows as dicts"""
+        with self._read_lock:
+            return [dict(row) for row in self._reader.execute(sql, params).fetchall()]
     
     def init_database(self):
         """Initialize the database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self.conn as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS links (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -35,6 +169,10 @@ class Database:
                 )
             ''')
             
+            # Link listings filter by channel and sort by time or filter by user
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_links_channel_time ON links(channel, timestamp DESC)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_links_channel_user ON links(channel, user, timestamp DESC)')
+            
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS messages (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -44,8 +182,46 @@ class Database:
                     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
-            
-            conn.commit()
+        
+        self._fts_enabled = self._init_fts()
+    
+    def _init_fts(self) -> bool:
+        """Create the FTS5 index over links (kept in sync by triggers). Returns False if FTS5 is unavailable"""
+        try:
+            with self._lock, self.conn as conn:
+                existing = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'links_fts'"
+                ).fetchone()
+                if existing:
+                    if ('trigram' in existing[0]) == _FTS_TRIGRAM:
+                        return True
+                    # Index built with the other tokenizer (e.g. before SQLite was upgraded); rebuild it
+                    conn.execute('DROP TABLE links_fts')
+                conn.executescript(f'''
+                    CREATE VIRTUAL TABLE links_fts USING fts5(
+                        title, description, url, content='links', content_rowid='id',
+                        tokenize='{_FTS_TOKENIZER}'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS links_ai AFTER INSERT ON links BEGIN
+                        INSERT INTO links_fts(rowid, title, description, url)
+                        VALUES (new.id, new.title, new.description, new.url);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS links_ad AFTER DELETE ON links BEGIN
+                        INSERT INTO links_fts(links_fts, rowid, title, description, url)
+                        VALUES ('delete', old.id, old.title, old.description, old.url);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS links_au AFTER UPDATE ON links BEGIN
+                        INSERT INTO links_fts(links_fts, rowid, title, description, url)
+                        VALUES ('delete', old.id, old.title, old.description, old.url);
+                        INSERT INTO links_fts(rowid, title, description, url)
+                        VALUES (new.id, new.title, new.description, new.url);
+                    END;
+                    INSERT INTO links_fts(links_fts) VALUES ('rebuild');
+                ''')
+                return True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable, link search will use LIKE scans: {e}")
+            return False
     
     def save_link(self, url: str, title: str, description: str, user: str, channel: str) -> bool:
         """Save a link to the database. Returns True if saved, False if duplicate"""
@@ -61,12 +237,8 @@ class Database:
             if description and len(description) > 2000:
                 description = description[:1997] + "..."
                 
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT INTO links (url, title, description, user, channel, timestamp)
-                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (url, title or '', description or '', user, channel))
-                conn.commit()
+            with self._lock, self.conn as conn:
+                conn.execute(INSERT_LINK_SQL, (url, title or '', description or '', user, channel))
                 return True
         except sqlite3.IntegrityError as e:
             if "UNIQUE constraint failed" in str(e):
@@ -81,126 +253,159 @@ class Database:
     
     def save_message(self, user: str, channel: str, message: str):
         """Save a message to the database for context/memory"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                INSERT INTO messages (user, channel, message)
-                VALUES (?, ?, ?)
-            ''', (user, channel, message))
-            conn.commit()
+        with self._lock, self.conn as conn:
+            conn.execute(INSERT_MESSAGE_SQL, (user, channel, message))
+    
+    def save_messages(self, rows: Iterable[Tuple[str, str, str, float]]):
+        """Save a batch of (user, channel, message, unix_time) rows in one transaction"""
+        with self._lock, self.conn as conn:
+            conn.executemany(INSERT_MESSAGE_AT_SQL, rows)
+    
+    def link_exists(self, url: str, channel: str) -> bool:
+        """Check whether a link has already been saved in a channel"""
+        try:
+            return bool(self._query(LINK_EXISTS_SQL, (url, channel)))
+        except Exception as e:
+            logger.error(f"Error checking link {url}: {e}")
+            return False
     
     def get_recent_links(self, channel: str, limit: int = 10) -> List[Dict]:
         """Get recent links from a channel"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute('''
-                SELECT url, title, user, timestamp
-                FROM links
-                WHERE channel = ?
-                ORDER BY timestamp DESC, rowid DESC
-                LIMIT ?
-            ''', (channel, limit))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._query(RECENT_LINKS_SQL, (channel, limit))
     
     def search_links(self, channel: str, query: str, limit: int = 10) -> List[Dict]:
-        """Search links by title or URL"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute('''
-                SELECT url, title, user, timestamp
-                FROM links
-                WHERE channel = ? AND (title LIKE ? OR url LIKE ?)
-                ORDER BY timestamp DESC
-                LIMIT ?
-            ''', (channel, f'%{query}%', f'%{query}%', limit))
-            return [dict(row) for row in cursor.fetchall()]
+        """Search links by title, description or URL (full-text; substring scan only without FTS5)"""
+        if self._fts_enabled:
+            # Quote each word so FTS operators like '-' or 'OR' in user input are taken literally.
+            # Trigrams match any substring of 3+ characters; shorter words can't be looked up and are skipped
+            if _FTS_TRIGRAM:
+                terms = ' '.join(f'"{word}"' for word in _FTS_WORD_RE.findall(query) if len(word) >= 3)
+            else:
+                terms = ' '.join(f'"{word}"*' for word in _FTS_WORD_RE.findall(query))
+            if terms:
+                try:
+                    # An empty result is the answer; a miss must not turn into a full LIKE scan
+                    return self._query(SEARCH_LINKS_FTS_SQL, (terms, channel, limit))
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"FTS search failed for {query!r}: {e}")
+        
+        return self._query(SEARCH_LINKS_LIKE_SQL, (channel, f'%{query}%', f'%{query}%', limit))
     
     def get_link_stats(self, channel: str) -> Dict:
         """Get basic statistics about saved links"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute('''
-                SELECT COUNT(*) as total_links,
-                       COUNT(DISTINCT user) as unique_users
-                FROM links
-                WHERE channel = ?
-            ''', (channel,))
-            
-            stats = dict(cursor.fetchone())
-            
-            # Get top contributor
-            cursor = conn.execute('''
-                SELECT user, COUNT(*) as count
-                FROM links
-                WHERE channel = ?
-                GROUP BY user
-                ORDER BY count DESC
-                LIMIT 1
-            ''', (channel,))
-            
-            top_user = cursor.fetchone()
-            if top_user:
-                stats['top_contributor'] = top_user['user']
-                stats['top_contributor_count'] = top_user['count']
-            
-            return stats
+        stats = self._query(LINK_COUNTS_SQL, (channel,))[0]
+        
+        # Get top contributor
+        top_user = self._query(TOP_CONTRIBUTORS_SQL, (channel, 1))
+        if top_user:
+            stats['top_contributor'] = top_user[0]['user']
+            stats['top_contributor_count'] = top_user[0]['count']
+        
+        return stats
         
     def get_links_with_details(self, channel: str, limit: int = 10) -> List[Dict]:
         """Get recent links with formatted timestamps and all details"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute('''
-                SELECT url, title, description, user, channel, 
-                       datetime(timestamp, 'localtime') as formatted_time,
-                       timestamp
-                FROM links
-                WHERE channel = ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            ''', (channel, limit))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._query(LINKS_WITH_DETAILS_SQL, (channel, limit))
     
     def get_all_links_by_user(self, channel: str, user: str) -> List[Dict]:
         """Get all links shared by a specific user in a channel"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute('''
-                SELECT url, title, user, datetime(timestamp, 'localtime') as formatted_time
-                FROM links
-                WHERE channel = ? AND user = ?
-                ORDER BY timestamp DESC
-            ''', (channel, user))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._query(ALL_LINKS_BY_USER_SQL, (channel, user))
     
     def get_links_by_user(self, channel: str, user: str, limit: int = 50) -> List[Dict]:
         """Get links by specific user - alias for get_all_links_by_user with limit"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute('''
-                SELECT url, title, user, timestamp
-                FROM links
-                WHERE channel = ? AND user = ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            ''', (channel, user, limit))
-            return [dict(row) for row in cursor.fetchall()]
+        return self._query(LINKS_BY_USER_SQL, (channel, user, limit))
     
     def get_stats(self, channel: str) -> Dict:
         """Get statistics for a channel - alias for get_link_stats"""
         stats = self.get_link_stats(channel)
         
         # Add top contributors list
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute('''
-                SELECT user, COUNT(*) as count
-                FROM links
-                WHERE channel = ?
-                GROUP BY user
-                ORDER BY count DESC
-                LIMIT 5
-            ''', (channel,))
-            
-            contributors = [dict(row) for row in cursor.fetchall()]
-            stats['top_contributors'] = {row['user']: row['count'] for row in contributors}
-            
+        contributors = self._query(TOP_CONTRIBUTORS_SQL, (channel, 5))
+        stats['top_contributors'] = {row['user']: row['count'] for row in contributors}
+        
         return stats
+
+
+class BatchWriter:
+    """Background writer that batches rows off the caller's thread and hands each batch to `write`"""
+    
+    def __init__(self, write: Callable[[List[tuple]], None], batch_size: int = 200,
+                 flush_interval: float = 1.0, max_pending: int = 10000, name: str = "batch-writer"):
+        self._write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Bounded so a stalled disk can't grow memory without limit; overflow is dropped and counted
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        # Set by close(); rows arriving afterwards would land behind the stop marker, so they're refused
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+    
+    def put_row(self, row: tuple):
+        """Queue a row for writing (never blocks the caller); rows after close() are dropped and counted"""
+        with self._close_lock:
+            if self._closed:
+                reason = "is closed"
+            else:
+                try:
+                    self._queue.put_nowait(row)
+                    return
+                except queue.Full:
+                    reason = "queue full"
+            self.dropped += 1
+        if self.dropped % 1000 == 1:
+            logger.warning(f"{self._thread.name} {reason}, {self.dropped} rows dropped so far")
+    
+    def close(self, timeout: float = 5.0):
+        """Flush queued rows and stop the writer thread"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.error(f"{self._thread.name} did not drain before shutdown")
+            return
+        self._thread.join(timeout)
+    
+    def _run(self):
+        """Collect up to batch_size messages or flush_interval seconds, then write them"""
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error(f"{self._thread.name} failed to write {len(batch)} rows: {e}")
+
+
+class MessageWriter(BatchWriter):
+    """Background writer that batches message saves off the IRC thread"""
+    
+    def __init__(self, db: Database, batch_size: int = 200, flush_interval: float = 1.0,
+                 max_pending: int = 10000):
+        self.db = db
+        super().__init__(db.save_messages, batch_size, flush_interval, max_pending, name="message-writer")
+    
+    def put(self, user: str, channel: str, message: str, timestamp: float):
+        """Queue a message for saving (never blocks the caller)"""
+        self.put_row((user, channel, message, timestamp))
@@ -1,14 +1,27 @@
 import re
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import validators
+from collections import OrderedDict
+from threading import Lock
 from typing import Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Max number of URLs whose metadata is kept in memory
+METADATA_CACHE_SIZE = 1024
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for cache lookups (lowercase scheme/host, no fragment or trailing slash)"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                       parts.path.rstrip('/'), parts.query, ''))
+
 class LinkHandler:
-    def __init__(self):
+    def __init__(self, pool_size: int = 10):
         # Regex pattern to find URLs in messages - improved to handle more cases
         self.url_pattern = re.compile(
             r'https?://[^\s<>"{}|\\^`\[\]]+',
@@ -19,9 +32,22 @@ class LinkHandler:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        
+        # Shared session keeps connections alive across fetches to the same hosts
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # LRU cache of successful lookups: normalized URL -> (title, description)
+        self._metadata_cache = OrderedDict()
+        self._cache_lock = Lock()
     
     def extract_urls(self, message: str) -> list:
         """Extract all URLs from a message"""
+        # Only http(s) URLs are matched, so a message without '://' cannot contain one
+        if '://' not in message:
+            return []
         urls = self.url_pattern.findall(message)
         # Clean up and validate URLs
         valid_urls = []
@@ -37,8 +63,15 @@ class LinkHandler:
         Fetch title and description from a URL
         Returns (title, description)
         """
+        key = normalize_url(url)
+        with self._cache_lock:
+            cached = self._metadata_cache.get(key)
+            if cached is not None:
+                self._metadata_cache.move_to_end(key)
+                return cached
+        
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             
             # Handle both .text and .content attributes
@@ -73,6 +106,12 @@ class LinkHandler:
             if len(description) > 300:
                 description = description[:297] + "..."
             
+            # Only successful fetches are cached so failures get retried
+            with self._cache_lock:
+                self._metadata_cache[key] = (title, description)
+                if len(self._metadata_cache) > METADATA_CACHE_SIZE:
+                    self._metadata_cache.popitem(last=False)
+            
             return title, description
             
         except requests.exceptions.RequestException as e:
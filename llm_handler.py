@@ -39,7 +39,7 @@ class LLMHandler:
         """Initialize the appropriate LLM clients based on configuration"""
         
         # Initialize local client (Ollama) if needed
-        if self.mode in ['local_only', 'fallback'] and self.config.LLM_ENABLED:
+        if self.mode in ('local_only', 'fallback') and self.config.LLM_ENABLED:
             try:
                 self.local_client = OpenAI(
                     base_url=self.config.LLM_BASE_URL,
@@ -51,7 +51,7 @@ class LLMHandler:
                 logger.error(f"Failed to initialize local LLM client: {e}")
                 
         # Initialize OpenAI client if needed
-        if self.mode in ['openai_only', 'fallback'] and self.config.OPENAI_ENABLED:
+        if self.mode in ('openai_only', 'fallback') and self.config.OPENAI_ENABLED:
             if not self.config.OPENAI_API_KEY:
                 logger.error("OpenAI API key is required but not provided")
                 return
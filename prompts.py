@@ -26,9 +26,10 @@ class PromptTemplates:
         # Check if personality prompt is enabled and available
         if config and config.PERSONALITY_ENABLED:
             try:
-                with open(config.PERSONALITY_PROMPT_FILE, 'r', encoding='utf-8') as f:
-                    personality_prompt = f.read().strip()
-                    
+                personality_prompt = config.personality_prompt()
+                if not personality_prompt:
+                    raise ValueError(f"{config.PERSONALITY_PROMPT_FILE} contains only whitespace")
+                
                 # Use personality prompt as the base, but still include bot name
                 base_prompt = f"You are {bot_name}. {personality_prompt}"
                 
@@ -5,14 +5,38 @@ Rate limiting functionality for the IRC bot
 
 import time
 import threading
-from collections import defaultdict, deque
-from typing import Dict, Deque
+from typing import Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Idle user buckets are swept after this many is_allowed calls
+SWEEP_INTERVAL = 1000
+
+class TokenBucket:
+    """Token bucket holding up to `capacity` tokens, refilled continuously over `per` seconds"""
+    
+    __slots__ = ('capacity', 'rate', 'tokens', 'last')
+    
+    def __init__(self, capacity: float, per: float = 60.0, now: Optional[float] = None):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per if per > 0 else 0.0
+        self.tokens = self.capacity
+        self.last = time.monotonic() if now is None else now
+    
+    def refill(self, now: float) -> float:
+        """Add tokens earned since the last refill and return the current token count"""
+        if now > self.last:
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+        return self.tokens
+    
+    def used(self) -> float:
+        """Tokens currently spent (roughly the requests made within the last period)"""
+        return self.capacity - self.tokens
+
 class RateLimiter:
-    """Rate limiter using sliding window approach"""
+    """Rate limiter using per-user and global token buckets"""
     
     def __init__(self, user_limit_per_minute: int = 1, total_limit_per_minute: int = 10):
         """
@@ -26,11 +50,13 @@ class RateLimiter:
         self.total_limit_per_minute = total_limit_per_minute
         self.window_size = 60  # 1 minute in seconds
         
-        # Track requests per user (sliding window)
-        self.user_requests: Dict[str, Deque[float]] = defaultdict(deque)
+        # One bucket per user, created on first request and swept once full again
+        self.user_buckets: Dict[str, TokenBucket] = {}
         
-        # Track total requests (sliding window)
-        self.total_requests: Deque[float] = deque()
+        # Shared bucket for the total limit
+        self.total_bucket = TokenBucket(total_limit_per_minute, self.window_size)
+        
+        self._calls = 0
         
         # Lock for thread safety
         self.lock = threading.Lock()
@@ -43,65 +69,57 @@ class RateLimiter:
         
         Args:
             user: Username making the request
-            
+        
         Returns:
             True if request is allowed, False if rate limited
         """
-        current_time = time.time()
+        now = time.monotonic()
         
         with self.lock:
-            # Clean up old requests (older than window_size)
-            self._cleanup_old_requests(current_time)
+            self._calls += 1
+            if self._calls >= SWEEP_INTERVAL:
+                self._sweep(now)
+            
+            bucket = self.user_buckets.get(user)
+            if bucket is None:
+                bucket = self.user_buckets[user] = TokenBucket(self.user_limit_per_minute, self.window_size, now)
             
             # Check user-specific rate limit
-            user_request_count = len(self.user_requests[user])
-            if user_request_count >= self.user_limit_per_minute:
-                logger.warning(f"Rate limit exceeded for user {user}: {user_request_count}/{self.user_limit_per_minute} per minute")
+            if bucket.refill(now) < 1:
+                logger.warning(f"Rate limit exceeded for user {user}: {round(bucket.used())}/{self.user_limit_per_minute} per minute")
                 return False
             
             # Check total rate limit
-            total_request_count = len(self.total_requests)
-            if total_request_count >= self.total_limit_per_minute:
-                logger.warning(f"Total rate limit exceeded: {total_request_count}/{self.total_limit_per_minute} per minute")
+            total = self.total_bucket
+            if total.refill(now) < 1:
+                logger.warning(f"Total rate limit exceeded: {round(total.used())}/{self.total_limit_per_minute} per minute")
                 return False
             
-            # Request is allowed - record it
-            self.user_requests[user].append(current_time)
-            self.total_requests.append(current_time)
+            # Request is allowed - spend a token from both buckets
+            bucket.tokens -= 1
+            total.tokens -= 1
             
-            logger.debug(f"Request allowed for {user}. User: {user_request_count + 1}/{self.user_limit_per_minute}, Total: {total_request_count + 1}/{self.total_limit_per_minute}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Request allowed for {user}. User: {round(bucket.used())}/{self.user_limit_per_minute}, Total: {round(total.used())}/{self.total_limit_per_minute}")
             return True
     
-    def _cleanup_old_requests(self, current_time: float):
-        """Remove requests older than the window size"""
-        cutoff_time = current_time - self.window_size
-        
-        # Clean up user requests
-        for user in list(self.user_requests.keys()):
-            user_queue = self.user_requests[user]
-            while user_queue and user_queue[0] < cutoff_time:
-                user_queue.popleft()
-            
-            # Remove empty queues to save memory
-            if not user_queue:
-                del self.user_requests[user]
-        
-        # Clean up total requests
-        while self.total_requests and self.total_requests[0] < cutoff_time:
-            self.total_requests.popleft()
+    def _sweep(self, now: float):
+        """Drop user buckets that have refilled completely (no recent requests)"""
+        self._calls = 0
+        full = [user for user, bucket in self.user_buckets.items() if bucket.refill(now) >= bucket.capacity]
+        for user in full:
+            del self.user_buckets[user]
     
     def get_stats(self) -> Dict[str, int]:
         """Get current rate limiting statistics"""
-        current_time = time.time()
+        now = time.monotonic()
         
         with self.lock:
-            self._cleanup_old_requests(current_time)
-            
-            total_requests = len(self.total_requests)
-            active_users = len(self.user_requests)
+            self.total_bucket.refill(now)
+            active_users = sum(1 for bucket in self.user_buckets.values() if bucket.refill(now) < bucket.capacity)
             
             return {
-                'total_requests_this_minute': total_requests,
+                'total_requests_this_minute': round(self.total_bucket.used()),
                 'total_limit': self.total_limit_per_minute,
                 'active_users': active_users,
                 'user_limit': self.user_limit_per_minute
@@ -109,15 +127,18 @@ class RateLimiter:
     
     def get_user_stats(self, user: str) -> Dict[str, int]:
         """Get rate limiting statistics for a specific user"""
-        current_time = time.time()
+        now = time.monotonic()
         
         with self.lock:
-            self._cleanup_old_requests(current_time)
-            
-            user_requests = len(self.user_requests.get(user, []))
+            bucket = self.user_buckets.get(user)
+            if bucket is None:
+                user_requests, remaining = 0, self.user_limit_per_minute
+            else:
+                remaining = int(bucket.refill(now))
+                user_requests = round(bucket.used())
             
             return {
                 'requests_this_minute': user_requests,
                 'limit': self.user_limit_per_minute,
-                'remaining': max(0, self.user_limit_per_minute - user_requests)
+                'remaining': remaining
             }
@@ -222,14 +222,14 @@ class SemanticSimilarityScorer:
         
         # Count technical keywords in question
         question_tech_count = sum(1 for keyword in self.config.SEMANTIC_TECHNICAL_KEYWORDS 
-                                 if keyword.lower() in question_lower)
+                                 if keyword in question_lower)
         
         if question_tech_count == 0:
             return 1.0
         
         # Count technical keywords addressed in response
         response_tech_count = sum(1 for keyword in self.config.SEMANTIC_TECHNICAL_KEYWORDS 
-                                 if keyword.lower() in response_lower)
+                                 if keyword in response_lower)
         
         # Calculate boost based on technical term coverage
         if response_tech_count > 0:
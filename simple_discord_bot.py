@@ -13,7 +13,6 @@ import re
 from typing import List, Dict, Optional
 
 import discord
-from dotenv import load_dotenv
 
 from config import Config
 from database import Database
@@ -24,9 +23,6 @@ from prompts import get_thinking_message
 from context_manager import ContextManager
 from content_filter import ContentFilter
 
-# Load environment variables
-load_dotenv()
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
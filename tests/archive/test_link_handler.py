@@ -86,7 +86,7 @@ class TestLinkHandler(unittest.TestCase):
             self.assertEqual(len(extracted), 1)
             self.assertTrue(extracted[0].lower().startswith(('http://', 'https://')))
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_success(self, mock_get):
         """Test successful metadata extraction"""
         # Mock successful response
@@ -111,7 +111,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(description, "This is a test page description")
         mock_get.assert_called_once()
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_no_title(self, mock_get):
         """Test metadata extraction when no title is present"""
         mock_response = Mock()
@@ -124,7 +124,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(title, "https://example.com")  # Should fall back to URL
         self.assertEqual(description, "")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_no_description(self, mock_get):
         """Test metadata extraction when no description is present"""
         mock_response = Mock()
@@ -137,7 +137,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(title, "Test Title")
         self.assertEqual(description, "")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_malformed_html(self, mock_get):
         """Test metadata extraction with malformed HTML"""
         mock_response = Mock()
@@ -150,7 +150,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(title, "Broken HTML")  # BeautifulSoup should handle this
         self.assertEqual(description, "")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_timeout(self, mock_get):
         """Test metadata extraction with request timeout"""
         mock_get.side_effect = Timeout("Request timed out")
@@ -160,7 +160,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(title, "https://example.com")  # Should fall back to URL
         self.assertEqual(description, "Could not fetch description")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_connection_error(self, mock_get):
         """Test metadata extraction with connection error"""
         mock_get.side_effect = ConnectionError("Connection failed")
@@ -170,7 +170,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(title, "https://example.com")
         self.assertEqual(description, "Could not fetch description")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_http_error(self, mock_get):
         """Test metadata extraction with HTTP error (404, 500, etc.)"""
         mock_response = Mock()
@@ -182,7 +182,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(title, "https://example.com")
         self.assertEqual(description, "Could not fetch description")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_encoding_issues(self, mock_get):
         """Test metadata extraction with encoding issues"""
         mock_response = Mock()
@@ -203,7 +203,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(title, "Tëst Pågé with Ünïcödé")
         self.assertEqual(description, "Déscríptíön wïth spëcíål chåråctërs")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_very_long_content(self, mock_get):
         """Test metadata extraction with very long title/description"""
         mock_response = Mock()
@@ -228,7 +228,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertGreater(len(title), 0)
         self.assertGreater(len(description), 0)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_link_metadata_request_headers(self, mock_get):
         """Test that proper headers are sent with requests"""
         mock_response = Mock()
@@ -285,7 +285,7 @@ class TestLinkHandler(unittest.TestCase):
                     continue
                 self.assertEqual(len(extracted), 0)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_concurrent_metadata_requests(self, mock_get):
         """Test handling of concurrent metadata requests"""
         import threading
@@ -343,7 +343,7 @@ class TestLinkHandlerIntegration(unittest.TestCase):
         self.assertEqual(urls[0], "https://example.com/article")
         
         # Step 2: Get metadata (mocked)
-        with patch('requests.get') as mock_get:
+        with patch('requests.Session.get') as mock_get:
             mock_response = Mock()
             mock_response.raise_for_status.return_value = None
             mock_response.text = '''
@@ -377,7 +377,7 @@ class TestLinkHandlerIntegration(unittest.TestCase):
         self.assertIn("https://github.com/example/repo", urls)
         self.assertIn("https://demo.example.com/app", urls)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_social_media_links(self, mock_get):
         """Test handling of social media and special site links"""
         test_links = [
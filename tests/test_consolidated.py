@@ -10,16 +10,18 @@ import os
 import time
 import tempfile
 import threading
+import socket
 from unittest.mock import Mock, patch, MagicMock
 from requests.exceptions import ConnectionError, Timeout
 import requests
+import irc.client
 
 # Add the project directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import all components
-from bot import AircBot
-from database import Database
+from bot import AircBot, SEND_BURST
+from database import Database, _FTS_TRIGRAM
 from link_handler import LinkHandler
 from llm_handler import LLMHandler
 from privacy_filter import PrivacyFilter, PrivacyConfig
@@ -27,14 +29,16 @@ from content_filter import ContentFilter
 from rate_limiter import RateLimiter
 from context_manager import ContextManager
 from config import Config
-from prompts import get_error_message
+from prompts import get_error_message, PromptTemplates
 
 class TestBotCore(unittest.TestCase):
     """Test core bot functionality: mention detection, commands, IRC handling"""
     
     def setUp(self):
-        """Set up test fixtures"""
-        self.bot = AircBot()
+        """Set up test fixtures with temporary link and audit databases"""
+        self.temp_dir = tempfile.mkdtemp()
+        with patch.object(Config, 'DATABASE_PATH', os.path.join(self.temp_dir, 'links.db')):
+            self.bot = AircBot()
         self.connection = Mock()
         self.connection.privmsg = Mock()
         self.connection.get_nickname = Mock(return_value="testbot")
@@ -43,6 +47,19 @@ class TestBotCore(unittest.TestCase):
         self.channel = "#test"
         self.user = "testuser"
     
+    def tearDown(self):
+        """Stop the bot's workers and remove the temporary databases"""
+        self.bot.shutdown_workers()
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _run_scheduled_sends(self):
+        """Refill the send bucket and run the reactor's scheduled sends until the outbox is empty"""
+        while self.bot._outboxes:
+            self.bot._send_bucket.last -= 60
+            for command in list(self.bot.reactor.scheduler.queue):
+                command.target()
+    
     def test_mention_detection(self):
         """Test bot mention detection patterns"""
         test_cases = [
@@ -70,6 +87,21 @@ class TestBotCore(unittest.TestCase):
                 result = self.bot.is_bot_mentioned(message)
                 self.assertEqual(result, expected)
     
+    def test_mention_regex_cache(self):
+        """Test the mention pattern is reused until the nick changes"""
+        self.assertTrue(self.bot.is_bot_mentioned("testbot: hi"))
+        cached = self.bot._mention_re
+        self.assertTrue(self.bot.is_bot_mentioned("TESTBOT hello"))
+        self.assertIs(self.bot._mention_re, cached)
+        
+        self.assertEqual(self.connection.get_nickname.call_count, 1)
+        
+        # A nick change is picked up on the next message
+        self.connection.get_nickname.return_value = "testbot_"
+        self.bot.on_nick(self.connection, Mock(source=Mock(nick="testbot"), target="testbot_"))
+        self.assertTrue(self.bot.is_bot_mentioned("testbot_: hi"))
+        self.assertIsNot(self.bot._mention_re, cached)
+    
     def test_capability_detection(self):
         """Test detection of bot capabilities from messages"""
         capability_tests = [
@@ -99,6 +131,40 @@ class TestBotCore(unittest.TestCase):
                 result = self.bot.is_bot_mentioned(message)
                 self.assertIsInstance(result, bool)
     
+    def test_capability_request_detection(self):
+        """Test questions about what the bot can do are recognized"""
+        for message in ["what can you do?", "so how do you work", "help!", "commands", "could you show help"]:
+            with self.subTest(message=message):
+                self.assertTrue(self.bot._is_asking_for_capabilities(message))
+        for message in ["what is python", "helpful tip", "nice work"]:
+            with self.subTest(message=message):
+                self.assertFalse(self.bot._is_asking_for_capabilities(message))
+    
+    def test_link_request_search_term(self):
+        """Test natural-language link searches extract the search term"""
+        self.bot.search_links = Mock()
+        self.bot._handle_links_request(self.connection, self.channel, "can you find rust async links please")
+        self.bot.search_links.assert_called_once_with(self.connection, self.channel, "rust async")
+        
+        self.assertTrue(self.bot._is_asking_for_links("links you saved"))
+        
+        # The gap between "links" and what follows it is not length-limited
+        self.assertTrue(self.bot._is_asking_for_links("links from the meetup, the rust ones you have"))
+        self.assertTrue(self.bot._is_asking_for_links(
+            "links from the meetup last night, the ones about rust and wasm that you have"))
+        self.assertFalse(self.bot._is_asking_for_links("the links in the slides were broken"))
+    
+    def test_capability_reply_is_scheduled(self):
+        """Test the capability reply is paced by the reactor instead of sleeping"""
+        with patch('bot.time.sleep') as mock_sleep:
+            self.bot._handle_capability_request(self.connection, self.channel, self.user)
+        mock_sleep.assert_not_called()
+        self.assertEqual(self.connection.privmsg.call_count, SEND_BURST)
+        
+        # Later lines go out as the reactor's scheduler runs the paced sends
+        self._run_scheduled_sends()
+        self.assertEqual(self.connection.privmsg.call_count, 19)
+    
     def test_command_parsing(self):
         """Test IRC command parsing"""
         test_cases = [
@@ -115,6 +181,197 @@ class TestBotCore(unittest.TestCase):
                     command = parts[0] if parts else None
                     args = parts[1:] if len(parts) > 1 else []
                     self.assertEqual((command, args), expected)
+    
+    def test_byte_length_truncation(self):
+        """Test IRC truncation is measured in UTF-8 bytes"""
+        self.assertEqual(self.bot._fit("short", 400), "short")
+        
+        fitted = self.bot._fit("📎" * 200, 300)
+        self.assertLessEqual(len(fitted.encode('utf-8')), 300)
+        self.assertTrue(fitted.endswith("..."))
+        self.assertNotIn("\ufffd", fitted)
+    
+    def test_link_deduplication(self):
+        """Test repeated links are only scheduled once"""
+        self.bot._link_pool = Mock()
+        
+        self.bot.process_links(self.connection, self.channel, self.user,
+                               "see https://example.com and https://example.com")
+        self.bot.process_links(self.connection, self.channel, self.user, "again https://example.com")
+        self.assertEqual(self.bot._link_pool.submit.call_count, 1)
+        
+        # The same link in another channel is still processed
+        self.bot.process_links(self.connection, "#other", self.user, "https://example.com")
+        self.assertEqual(self.bot._link_pool.submit.call_count, 2)
+    
+    def test_known_link_skips_fetch(self):
+        """Test links already saved in the channel are not fetched again"""
+        self.bot.db = Mock()
+        self.bot.db.link_exists.return_value = True
+        self.bot.link_handler.get_link_metadata = Mock()
+        
+        self.bot._process_single_link(self.connection, self.channel, self.user, "https://example.com")
+        self.bot.link_handler.get_link_metadata.assert_not_called()
+        self.bot.db.save_link.assert_not_called()
+    
+    def test_reactor_call_queue(self):
+        """Test sends from worker threads are deferred to the reactor thread"""
+        worker = threading.Thread(target=self.bot.call_on_reactor,
+                                  args=(self.connection.privmsg, self.channel, "from worker"))
+        worker.start()
+        worker.join()
+        self.connection.privmsg.assert_not_called()
+        
+        self.bot._run_reactor_calls()
+        self.connection.privmsg.assert_called_once_with(self.channel, "from worker")
+    
+    def test_shutdown_waits_for_workers(self):
+        """Test shutdown lets running worker jobs finish before the databases are closed"""
+        started = threading.Event()
+        
+        def job():
+            started.set()
+            time.sleep(0.2)
+            # Raises sqlite3.ProgrammingError if the connection was closed underneath the job
+            return self.bot.db._query("SELECT COUNT(*) AS n FROM links")
+        
+        future = self.bot._link_pool.submit(job)
+        started.wait(1)
+        self.bot.shutdown_workers()
+        self.assertIn('n', future.result()[0])
+    
+    def test_worker_replies_go_through_reactor(self):
+        """Test LLM worker replies are handed to the reactor thread instead of written directly"""
+        self.bot.llm_handler.ask_llm = Mock(return_value="Docker images are layered.")
+        self.bot._process_ask_request(self.connection, self.channel, self.user, "what is docker?")
+        self.connection.privmsg.assert_not_called()
+        self.bot._run_reactor_calls()
+        self.connection.privmsg.assert_called_once_with(self.channel, "🤖 Docker images are layered.")
+        
+        self.bot.llm_handler.ask_llm.side_effect = RuntimeError("model offline")
+        self.bot._process_private_conversation(self.connection, self.user, "hello there")
+        self.assertEqual(self.connection.privmsg.call_count, 1)
+        self.bot._run_reactor_calls()
+        self.connection.privmsg.assert_called_with(self.user, "❌ Something went wrong. Please try again later.")
+    
+    def test_privmsg(self):
+        """Test replies go out through privmsg and lines the library rejects are dropped, not raised"""
+        connection = irc.client.ServerConnection(irc.client.Reactor())
+        connection.socket, peer = socket.socketpair()
+        try:
+            for line in ["one", "x" * 600, "bad\nline", "two"]:
+                self.bot._privmsg(connection, self.channel, line)
+            expected = b"PRIVMSG #test :one\r\nPRIVMSG #test :two\r\n"
+            received = b""
+            while len(received) < len(expected):
+                received += peer.recv(4096)
+            self.assertEqual(received, expected)
+        finally:
+            connection.socket.close()
+            peer.close()
+        
+        # Not connected: logged and dropped instead of raising
+        self.bot._privmsg(connection, self.channel, "one")
+    
+    def test_long_message_pacing(self):
+        """Test long replies only wait once the send burst is used up, without blocking the reactor"""
+        with patch('bot.time.sleep') as mock_sleep:
+            self.bot._send_long_message(self.connection, self.channel, "word " * 160)
+            self.assertEqual(self.connection.privmsg.call_count, 2)
+            
+            self.bot._send_long_message(self.connection, self.channel, "word " * 320)
+        mock_sleep.assert_not_called()
+        self.assertEqual(self.connection.privmsg.call_count, 4)
+        self.assertEqual(len(self.bot._outboxes[(self.connection, self.channel)]), 2)
+        
+        self._run_scheduled_sends()
+        self.assertEqual(self.connection.privmsg.call_count, 6)
+    
+    def test_listings_share_send_bucket(self):
+        """Test multi-line listings are paced by the shared bucket, in order per target and in turns across targets"""
+        self.bot.db = Mock()
+        self.bot.db.get_links_with_details.return_value = [
+            {'title': f"link {i}", 'user': "alice", 'formatted_time': "now", 'url': f"https://example.com/{i}"}
+            for i in range(5)
+        ]
+        self.bot.show_detailed_links(self.connection, self.channel)
+        self.bot.show_help(self.connection, self.channel)
+        self.assertEqual(self.connection.privmsg.call_count, SEND_BURST)
+        
+        self._run_scheduled_sends()
+        sent = [call[0][1] for call in self.connection.privmsg.call_args_list]
+        self.assertEqual(len(sent), 6 + len(self.bot._help_lines))
+        self.assertEqual(sent[5], "• link 4 | 👤 alice | 🕐 now | 🔗 https://example.com/4")
+        self.assertEqual(sent[6:], list(self.bot._help_lines))
+        
+        # Another target's listing takes turns with a queued one instead of waiting behind it
+        self.connection.privmsg.reset_mock()
+        self.bot._send_bucket.last -= 60
+        self.bot.show_help(self.connection, self.channel)
+        self.bot.show_help(self.connection, self.user)
+        self.bot._send_bucket.last -= 60
+        self.bot._drain_outbox()
+        targets = [call[0][0] for call in self.connection.privmsg.call_args_list]
+        self.assertEqual(targets[SEND_BURST:], [self.channel, self.user] * (SEND_BURST // 2))
+        
+        # Single-line notices skip the queues entirely
+        self.bot.db.get_recent_links.return_value = []
+        self.bot.show_recent_links(self.connection, "#other")
+        self.assertEqual(self.connection.privmsg.call_args[0], ("#other", "No links saved yet!"))
+        self._run_scheduled_sends()
+    
+    def test_private_command_announcement(self):
+        """Test commands answered privately are announced once in the channel"""
+        self.bot.rate_limiter.is_allowed = Mock(return_value=True)
+        self.bot.config.COMMANDS_USE_PRIVATE_MSG = True
+        
+        self.bot.handle_command(self.connection, self.channel, self.user, "!rl")
+        self._run_scheduled_sends()
+        targets = [call[0][0] for call in self.connection.privmsg.call_args_list]
+        self.assertEqual(targets[-1], self.channel)
+        self.assertTrue(all(target == self.user for target in targets[:-1]))
+        self.assertIn("rate limit info", self.connection.privmsg.call_args[0][1])
+        
+        # Already in a private chat: no announcement
+        self.connection.privmsg.reset_mock()
+        self.bot.handle_command(self.connection, self.user, self.user, "!rl", is_private=True)
+        self._run_scheduled_sends()
+        targets = [call[0][0] for call in self.connection.privmsg.call_args_list]
+        self.assertEqual(set(targets), {self.user})
+    
+    def test_long_message_sentence_split(self):
+        """Test long replies are split after the last sentence that fits"""
+        message = "Is this the first sentence? " * 5 + "Then a second one. " * 10 + "x" * 300
+        self.bot._send_long_message(self.connection, self.channel, message)
+        parts = [call[0][1] for call in self.connection.privmsg.call_args_list]
+        self.assertTrue(parts[0].endswith("Then a second one. "))
+        self.assertLessEqual(len(parts[0]), 400)
+        self.assertEqual("".join(parts), message)
+    
+    def test_long_message_byte_split(self):
+        """Test non-ASCII replies are split by UTF-8 bytes and never stop the reactor"""
+        connection = irc.client.ServerConnection(self.bot.reactor)
+        connection.socket, peer = socket.socketpair()
+        try:
+            self.bot._send_lines(connection, self.channel, [f"line {i}" for i in range(5)])
+            self.bot._send_long_message(connection, self.channel, "漢" * 400)
+            self._run_scheduled_sends()
+            sent = peer.recv(65536).split(b"\r\n")[:-1]
+        finally:
+            connection.socket.close()
+            peer.close()
+        parts = [line.split(b" :", 1)[1] for line in sent[5:]]
+        self.assertEqual(b"".join(parts).decode('utf-8'), "漢" * 400)
+        self.assertTrue(all(len(part) <= 400 for part in parts))
+        
+        # Lines the library would reject are logged and skipped on the fallback path too
+        self.connection.privmsg.side_effect = irc.client.MessageTooLong("too long")
+        self.bot._privmsg(self.connection, self.channel, "x" * 600)
+    
+    def test_clean_response_for_irc(self):
+        """Test LLM responses are flattened to a single IRC line"""
+        response = "<think>hidden\nreasoning</think>\n  First line.\r\nSecond\tline  \n"
+        self.assertEqual(self.bot._clean_response_for_irc(response), "First line. Second line")
 
 
 class TestDatabase(unittest.TestCase):
@@ -138,9 +395,13 @@ class TestDatabase(unittest.TestCase):
         user = "testuser"
         channel = "#test"
         
+        self.assertFalse(self.db.link_exists(url, channel))
+        
         # Save link
         result = self.db.save_link(url, title, description, user, channel)
         self.assertTrue(result)
+        self.assertTrue(self.db.link_exists(url, channel))
+        self.assertFalse(self.db.link_exists(url, "#other"))
         
         # Retrieve links
         links = self.db.get_recent_links(channel, limit=5)
@@ -188,6 +449,30 @@ class TestDatabase(unittest.TestCase):
         results = self.db.search_links(channel, "GitHub")
         self.assertEqual(len(results), 1)
         self.assertIn("github.com", results[0]['url'])
+        
+        # Descriptions are searchable and FTS operators in the query are taken literally
+        results = self.db.search_links(channel, "repository -code")
+        self.assertEqual(len(results), 1)
+        self.assertIn("github.com", results[0]['url'])
+        
+        # A miss is answered by the index alone, without falling back to a LIKE scan
+        with patch.object(self.db, '_query', wraps=self.db._query) as query:
+            self.assertEqual(self.db.search_links(channel, "nonexistent"), [])
+        self.assertEqual(query.call_count, 1)
+    
+    @unittest.skipUnless(_FTS_TRIGRAM, "SQLite build without the FTS5 trigram tokenizer")
+    def test_link_search_substring(self):
+        """Test substring searches are served by the trigram index"""
+        channel = "#test"
+        self.db.save_link("https://example.com", "Example", "Test site", "testuser", channel)
+        self.db.save_link("https://python.org", "Python Official", "Python website", "testuser", channel)
+        
+        results = self.db.search_links(channel, "xampl")
+        self.assertEqual(len(results), 1)
+        self.assertIn("example.com", results[0]['url'])
+        
+        # Too short for a trigram lookup: answered by the substring scan
+        self.assertEqual(len(self.db.search_links(channel, "py")), 1)
     
     def test_database_stats(self):
         """Test database statistics functionality"""
@@ -225,6 +510,41 @@ class TestDatabase(unittest.TestCase):
         long_desc = "y" * 5000
         result = self.db.save_link("https://long-content.com", long_title, long_desc, "user", channel)
         self.assertTrue(result)
+    
+    def test_batched_message_writes(self):
+        """Test the background message writer flushes queued messages"""
+        from database import MessageWriter
+        import sqlite3
+        
+        writer = MessageWriter(self.db, batch_size=10, flush_interval=0.05)
+        for i in range(25):
+            writer.put("user1", "#test", f"message {i}", time.time())
+        writer.close()
+        
+        # Rows arriving after close are refused and counted rather than queued behind the stop marker
+        writer.put("user1", "#test", "too late", time.time())
+        self.assertEqual(writer.dropped, 1)
+        
+        with sqlite3.connect(self.temp_db.name) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        self.assertEqual(count, 25)
+    
+    def test_message_writer_drops_when_full(self):
+        """Test a stalled writer drops and counts overflow instead of blocking"""
+        from database import MessageWriter
+        
+        release = threading.Event()
+        db = Mock()
+        db.save_messages.side_effect = lambda rows: release.wait(5)
+        writer = MessageWriter(db, batch_size=1, flush_interval=0.05, max_pending=2)
+        for i in range(10):
+            writer.put("user1", "#test", f"message {i}", time.time())
+        self.assertGreaterEqual(writer.dropped, 7)
+        
+        release.set()
+        writer.close()
+        saved = sum(len(call[0][0]) for call in db.save_messages.call_args_list)
+        self.assertEqual(saved + writer.dropped, 10)
 
 
 class TestLinkHandler(unittest.TestCase):
@@ -253,7 +573,7 @@ class TestLinkHandler(unittest.TestCase):
                 result = self.handler.extract_urls(message)
                 self.assertEqual(result, expected)
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_metadata_extraction(self, mock_get):
         """Test metadata extraction from web pages"""
         # Mock successful response
@@ -275,7 +595,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(title, "Test Page Title")
         self.assertEqual(description, "This is a test page description")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_metadata_error_handling(self, mock_get):
         """Test metadata extraction error handling"""
         # Test connection error
@@ -286,7 +606,7 @@ class TestLinkHandler(unittest.TestCase):
         self.assertEqual(title, "https://example.com")  # Falls back to URL
         self.assertEqual(description, "Could not fetch description")
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_metadata_malformed_html(self, mock_get):
         """Test handling of malformed HTML"""
         mock_response = Mock()
@@ -298,6 +618,21 @@ class TestLinkHandler(unittest.TestCase):
         
         self.assertEqual(title, "Broken HTML")  # BeautifulSoup handles this
         self.assertEqual(description, "")
+    
+    @patch('requests.Session.get')
+    def test_metadata_cache(self, mock_get):
+        """Test repeated URLs are served from the metadata cache"""
+        mock_response = Mock()
+        mock_response.raise_for_status.return_value = None
+        mock_response.text = '<html><head><title>Cached Page</title></head></html>'
+        mock_get.return_value = mock_response
+        
+        first = self.handler.get_link_metadata("https://Example.com/page/")
+        second = self.handler.get_link_metadata("https://example.com/page#top")
+        
+        self.assertEqual(first, ("Cached Page", ""))
+        self.assertEqual(second, first)
+        self.assertEqual(mock_get.call_count, 1)
 
 
 class TestLLMHandler(unittest.TestCase):
@@ -416,6 +751,22 @@ class TestLLMHandler(unittest.TestCase):
         
         self.assertEqual(call_count, 3)  # Should have retried
         self.assertEqual(result, "Success after retries!")
+    
+    def test_personality_prompt_read_once(self):
+        """Test personality prompt file is read on first use and then served from cache"""
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write("Talk like a pirate.\n")
+        try:
+            self.config.PERSONALITY_ENABLED = True
+            self.config.PERSONALITY_PROMPT_FILE = f.name
+            prompt = PromptTemplates.get_system_prompt("aircbot", config=self.config)
+            self.assertTrue(prompt.startswith("You are aircbot. Talk like a pirate."))
+            
+            # Later prompts reuse the cached contents without reopening the file
+            with patch('builtins.open', side_effect=AssertionError("file reopened")):
+                self.assertEqual(self.config.personality_prompt(), "Talk like a pirate.")
+        finally:
+            os.unlink(f.name)
 
 
 class TestPrivacyFilter(unittest.TestCase):
@@ -545,18 +896,182 @@ class TestRateLimiter(unittest.TestCase):
         
         self.assertIsInstance(stats1, dict)
         self.assertIsInstance(stats2, dict)
+    
+    def test_token_refill(self):
+        """Test spent tokens refill over the window"""
+        from rate_limiter import TokenBucket
+        
+        bucket = TokenBucket(2, per=60.0, now=0.0)
+        bucket.tokens -= 2
+        self.assertLess(bucket.refill(15.0), 1)   # Half a token after 15s
+        self.assertGreaterEqual(bucket.refill(30.0), 1)  # One token after 30s
+        self.assertEqual(bucket.refill(600.0), 2)  # Never exceeds capacity
+
+
+class TestContextManager(unittest.TestCase):
+    """Test message context queues and relevance scoring"""
+    
+    def setUp(self):
+        """Set up context manager with scoring weights from the default config"""
+        self.config = Config()
+        self.config.CONTEXT_ANALYSIS_ENABLED = True
+        self.config.PRIVACY_FILTER_ENABLED = False
+        self.context = ContextManager(self.config)
+    
+    def test_relevant_context(self):
+        """Test technical and overlapping messages are picked over unrelated chatter"""
+        self.context.add_message("alice", "#test", "my python docker build fails with an import error")
+        self.context.add_message("bob", "#test", "lol ok")
+        self.context.add_message("carol", "#test", "anyone watching the game tonight")
+        
+        relevant = self.context.get_relevant_context("#test", "how do I fix a python import error in docker?")
+        self.assertEqual([msg.user for msg in relevant], ["alice"])
+        self.assertEqual(self.context.get_relevant_context("#other", "python"), [])
+    
+    def test_message_features_precomputed(self):
+        """Test scoring features are derived once when a message is queued"""
+        self.context.add_message("alice", "#test", "Is the Docker testing guide at https://example.com?")
+        message = self.context.get_recent_context("#test", 1)[0]
+        self.assertIn("docker", message.words)
+        self.assertTrue({"docker", "test", "testing"} <= message.tech)
+        self.assertTrue(message.is_question)
+        self.assertTrue(message.has_link)
+        self.assertFalse(message.is_short)
+    
+    def test_context_summary(self):
+        """Test summary counts users, commands and mentions in the channel queue"""
+        self.assertEqual(self.context.get_context_summary("#test")['total_messages'], 0)
+        self.context.add_message("alice", "#test", "!links")
+        self.context.add_message("bob", "#test", "bot: hi", is_command=False, is_bot_mention=True)
+        self.context.add_message("alice", "#test", "!ask what is docker", is_command=True)
+        
+        summary = self.context.get_context_summary("#test")
+        self.assertEqual(summary['total_messages'], 3)
+        self.assertEqual(summary['unique_users'], 2)
+        self.assertEqual(summary['commands'], 1)
+        self.assertEqual(summary['bot_mentions'], 1)
+        self.assertLessEqual(summary['oldest_timestamp'], summary['newest_timestamp'])
+        
+        # Totals follow messages as the full queue evicts them
+        self.config.MESSAGE_QUEUE_SIZE = 2
+        self.context.add_message("carol", "#small", "!ask first", is_command=True)
+        self.context.add_message("dave", "#small", "hello")
+        self.context.add_message("dave", "#small", "again")
+        summary = self.context.get_context_summary("#small")
+        self.assertEqual((summary['total_messages'], summary['unique_users'], summary['commands']), (2, 1, 0))
+        self.assertEqual(self.context.get_channel_users("#small"), {"dave"})
+        
+        self.context.clear_channel_context("#small")
+        self.assertEqual(self.context.get_context_summary("#small")['unique_users'], 0)
+
+
+class TestContentFilter(unittest.TestCase):
+    """Test content filtering and audit logging"""
+    
+    def setUp(self):
+        """Set up content filter with a temporary audit database"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = Mock()
+        self.config.DATABASE_PATH = os.path.join(self.temp_dir, 'links.db')
+        self.filter = ContentFilter(self.config)
+    
+    def tearDown(self):
+        """Clean up temporary audit database"""
+        self.filter.close()
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_explicit_content(self):
+        """Test explicit terms are blocked and reported from the first matching category"""
+        self.assertTrue(self.filter.filter_content("how do I reverse a list in python", "alice", "#test").is_allowed)
+        
+        result = self.filter.filter_content("I will attack with a knife", "alice", "#test")
+        self.assertFalse(result.is_allowed)
+        self.assertEqual(result.filter_type, "explicit_pattern")
+        self.assertEqual(result.reason, "Explicit content detected: attack")
+        
+        # Audit rows are written in the background; closing the writer flushes them
+        self.filter._audit_writer.close()
+        self.assertEqual(self.filter.get_user_violation_count("alice"), 1)
+        
+        # Word lookup keeps \b semantics; phrases with gaps still go through the regex
+        self.assertTrue(self.filter._check_explicit_patterns("a classic bass line").is_allowed)
+        self.assertFalse(self.filter._check_explicit_patterns("KILL!").is_allowed)
+        self.assertFalse(self.filter._check_explicit_patterns("blow  job").is_allowed)
+    
+    def test_llm_assisted_filter_bounds(self):
+        """Test LLM analysis is skipped for short messages and called with a timeout otherwise"""
+        self.filter.close()
+        self.config.CONTENT_FILTER_LLM_ASSIST = True
+        self.config.CONTENT_FILTER_LLM_TIMEOUT = 2.0
+        llm_handler = Mock()
+        create = llm_handler.local_client.chat.completions.create
+        create.return_value.choices = [Mock(message=Mock(content="INAPPROPRIATE: rude"))]
+        self.filter = ContentFilter(self.config, llm_handler)
+        
+        self.assertTrue(self.filter.filter_content("sure thing", "alice", "#test").is_allowed)
+        create.assert_not_called()
+        
+        result = self.filter.filter_content("what do you think of my neighbour's cat", "alice", "#test")
+        self.assertEqual(result.reason, "LLM analysis: rude")
+        self.assertEqual(create.call_args[1]['timeout'], 2.0)
+        self.assertIn("my neighbour's cat", create.call_args[1]['messages'][0]['content'])
+    
+    def test_audit_stats(self):
+        """Test audit stats aggregate by filter type and user"""
+        for message, user in [("I will attack", "alice"), ("kill it", "alice"), ("call 555-123-4567", "bob")]:
+            self.filter.filter_content(message, user, "#test")
+        self.filter._audit_writer.close()
+        
+        stats = self.filter.get_audit_stats(24)
+        self.assertEqual(stats['total_blocked'], 3)
+        self.assertEqual(stats['by_filter_type'], {'explicit_pattern': 2, 'personal_info': 1})
+        self.assertEqual(list(stats['top_users'].items()), [('alice', 2), ('bob', 1)])
+        
+        # Only attempts inside the window are counted
+        self.filter._save_blocked_attempts([("alice", "#test", "hash", "explicit_pattern", "old", 0.9, False, 5,
+                                             int(time.time()) - 48 * 3600)])
+        self.assertEqual(self.filter.get_user_violation_count("alice", 24), 2)
+        self.assertEqual(self.filter.get_user_violation_count("alice", 72), 3)
+        self.assertEqual(self.filter.get_audit_stats(24)['total_blocked'], 3)
+    
+    def test_personal_info_and_suspicious_patterns(self):
+        """Test PII and spam-like patterns are blocked while ordinary chat passes"""
+        cases = [
+            ("lol ok", True, ""),
+            ("meet at 5pm in room 12", True, ""),
+            ("my ssn is 123-45-6789", False, "Personal information detected: SSN"),
+            ("card 4111 1111 1111 1111", False, "Personal information detected: Credit Card"),
+            ("mail me at someone@example.com", False, "Personal information detected: Email"),
+            ("call 555-123-4567", False, "Personal information detected: Phone"),
+            ("THIS IS VERYLOUDTEXT", False, "Suspicious character patterns detected"),
+            ("wow!!!!!", False, "Suspicious character patterns detected"),
+        ]
+        for message, allowed, reason in cases:
+            with self.subTest(message=message):
+                result = self.filter.filter_content(message, "bob", "#test")
+                self.assertEqual(result.is_allowed, allowed)
+                self.assertEqual(result.reason, reason)
 
 
 class TestIntegration(unittest.TestCase):
     """Test integration between components"""
     
     def setUp(self):
-        """Set up integration test environment"""
-        self.bot = AircBot()
+        """Set up integration test environment with temporary databases"""
+        self.temp_dir = tempfile.mkdtemp()
+        with patch.object(Config, 'DATABASE_PATH', os.path.join(self.temp_dir, 'links.db')):
+            self.bot = AircBot()
         self.connection = Mock()
         self.connection.privmsg = Mock()
         self.connection.get_nickname = Mock(return_value="testbot")
     
+    def tearDown(self):
+        """Stop the bot's workers and remove the temporary databases"""
+        self.bot.shutdown_workers()
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
     def test_link_workflow(self):
         """Test complete link saving and retrieval workflow"""
         # This would test the full workflow from message processing
@@ -582,6 +1097,55 @@ class TestIntegration(unittest.TestCase):
         # This would test that rate limiting properly blocks
         # rapid-fire commands from users
         pass
+    
+    def test_env_file_parsing(self):
+        """Test .env parsing handles comments, quotes and export prefixes"""
+        from config import parse_env_file
+        with tempfile.NamedTemporaryFile('w', suffix='.env', delete=False) as f:
+            f.write("# comment\n"
+                    "IRC_PORT=6697\n"
+                    "export IRC_NICKNAME=testbot\n"
+                    "PRIVACY_LEVEL=medium  # none, low, medium\n"
+                    "IRC_CHANNEL='#test'\n"
+                    'LLM_MODEL="deepseek-r1:latest" # local model\n'
+                    "IRC_PASSWORD=\n"
+                    "NOT_AN_ASSIGNMENT\n")
+        try:
+            self.assertEqual(parse_env_file(f.name), {
+                'IRC_PORT': '6697',
+                'IRC_NICKNAME': 'testbot',
+                'PRIVACY_LEVEL': 'medium',
+                'IRC_CHANNEL': '#test',
+                'LLM_MODEL': 'deepseek-r1:latest',
+                'IRC_PASSWORD': '',
+            })
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(parse_env_file(f.name), {})
+    
+    def test_worker_count_validation(self):
+        """Test worker pool sizes below 1 are rejected at validation"""
+        for key in ('LINK_WORKERS', 'LLM_WORKERS'):
+            for value in (0, -1):
+                with self.subTest(key=key, value=value), patch.object(Config, key, value):
+                    with self.assertRaisesRegex(ValueError, f'{key} must be at least 1'):
+                        Config.validate()
+    
+    def test_personality_file_validation(self):
+        """Test missing or empty personality files are rejected at validation"""
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            pass
+        try:
+            with patch.object(Config, 'PERSONALITY_ENABLED', True), \
+                 patch.object(Config, 'PERSONALITY_PROMPT_FILE', f.name):
+                with self.assertRaisesRegex(ValueError, 'is empty'):
+                    Config.validate()
+                os.unlink(f.name)
+                with self.assertRaisesRegex(ValueError, 'does not exist'):
+                    Config.validate()
+        finally:
+            if os.path.exists(f.name):
+                os.unlink(f.name)
 
 
 def create_test_suite():
@@ -596,6 +1160,8 @@ def create_test_suite():
         TestLLMHandler,
         TestPrivacyFilter,
         TestRateLimiter,
+        TestContextManager,
+        TestContentFilter,
         TestIntegration,
     ]
     